@@ -137,7 +137,7 @@ export class MasterDataSyncService {
           area_id TEXT, area_name TEXT, area_description TEXT, area_status TEXT,
           zone_id TEXT, zone_name TEXT, zone_description TEXT, zone_status TEXT,
           region_id TEXT, region_name TEXT, region_description TEXT, region_status TEXT,
-          full_path TEXT
+          full_path TEXT, area_name_kana TEXT, zone_name_kana TEXT, region_name_kana TEXT, search_text TEXT
         );
         CREATE TABLE IF NOT EXISTS master_point_creatures (
           id TEXT PRIMARY KEY, point_id TEXT, creature_id TEXT, localRarity TEXT, updatedAt TEXT
@@ -0,0 +1,114 @@
+"""
+kana-converter の同時リクエスト負荷テスト。
+
+関数を functions-framework で実際に起動し（同期版 fn_to_kana は gunicorn、ASGI 版 fn_to_kana_async は uvicorn）、
+同時接続数ごとに一定数の変換リクエストを送って requests/s と p50/p95/p99 レイテンシを表示する。
+キャッシュは無効にして毎回トークナイズさせる。
+
+Usage:
+    python benchmarks/bench_concurrency.py [--targets fn_to_kana,fn_to_kana_async] [--concurrency 1,8,32]
+                                           [--requests 400] [--batch-size 20] [--env KEY=VALUE]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import corpus
+from metrics import latency_summary
+
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(target, port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "functions_framework", "--target", target, "--source", "main.py", "--port", str(port)],
+        cwd=FUNCTION_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/warmup")
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{target} did not start on port {port}")
+
+
+def run_load(port, bodies, concurrency):
+    """concurrency 本のスレッドで bodies を送り切るまでの requests/s とレイテンシを返す"""
+    latencies, errors = [], []
+    cursor = iter(range(len(bodies)))
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            conn.request("POST", "/", bodies[i], {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                (latencies if response.status == 200 else errors).append(elapsed)
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {"concurrency": concurrency, "rps": round(len(latencies) / elapsed, 1), "errors": len(errors),
+            **latency_summary(latencies)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="kana-converter concurrent load test")
+    parser.add_argument("--targets", default="fn_to_kana,fn_to_kana_async")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument("--batch-size", type=int, default=20, help="Items per request")
+    parser.add_argument("--env", action="append", default=[], help="Extra environment variable for the server (KEY=VALUE)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = corpus.names()
+    bodies = [
+        json.dumps({"items": [{"id": str(j), "name": rng.choice(texts)} for j in range(args.batch_size)]})
+        for _ in range(args.requests)
+    ]
+    env = dict(os.environ, KANA_CACHE_SIZE="0", KANA_READINGS_DB="")
+    env.update(kv.split("=", 1) for kv in args.env)
+
+    print(f"requests={args.requests} batch_size={args.batch_size} cpus={os.cpu_count()}")
+    for target in args.targets.split(","):
+        port = free_port()
+        proc = start_server(target, port, env)
+        try:
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                result = run_load(port, bodies, concurrency)
+                print(f"  {target:<18} c={concurrency:<3} {result['rps']:>8.1f} req/s  p50={result['p50_ms']:.1f}ms "
+                      f"p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms errors={result['errors']}")
+        finally:
+            proc.terminate()
+            proc.wait()
@@ -0,0 +1,103 @@
+"""
+エンリッチャーの変換処理を HTTP モードとプロセス内モードで比較する。
+
+シードデータの生物・ポイントを enricher と同じ形式・ページサイズで、
+変換（call_converter）と検索用フィールドの構築（build_search_fields）まで実行し、以下を表示する。
+  - cold_ms:  最初のページの所要時間（HTTP は kana-converter 起動済み・辞書ロード前、プロセス内は辞書ロードを含む）
+  - total_ms: 全ページの所要時間
+  - rows/s:   全ページのスループット
+BigQuery の読み書きは含まない（両モードで共通のため）。HTTP モードは kana-converter をローカルで起動して計測する。
+
+Usage:
+    python benchmarks/bench_enricher_modes.py [--repeat 3] [--page-size 1000] [--target fn_to_kana]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import corpus
+from bench_concurrency import free_port, FUNCTION_DIR
+
+ENRICHER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "enricher")
+CREATURE_FIELDS = ["name", "scientificName", "englishName", "family", "category"]
+POINT_FIELDS = ["name", "area"]
+
+# 両モードとも毎回トークナイズさせる
+os.environ.update({"KANA_CACHE_SIZE": "0", "KANA_READINGS_DB": ""})
+sys.path.insert(0, ENRICHER_DIR)
+import conversion  # noqa: E402
+
+
+def pages(page_size):
+    points, _ = corpus.point_rows()
+    tables = [(corpus.creature_rows(), CREATURE_FIELDS), ([{k: v for k, v in p.items() if v} for p in points], POINT_FIELDS)]
+    for rows, fields in tables:
+        for i in range(0, len(rows), page_size):
+            yield rows[i:i + page_size], fields
+
+
+def run(page_size):
+    durations = []
+    rows = 0
+    for page, fields in pages(page_size):
+        started = time.perf_counter()
+        conversion.build_search_fields(conversion.call_converter(page), fields)
+        durations.append((time.perf_counter() - started) * 1000)
+        rows += len(page)
+    return durations, rows
+
+
+def start_converter(target):
+    """kana-converter を起動し、応答できるようになるまで待つ（辞書はロードしない）"""
+    import http.client
+
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "functions_framework", "--target", target, "--source", "main.py", "--port", str(port)],
+        cwd=FUNCTION_DIR, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/healthz")
+            if conn.getresponse().status == 200:
+                return proc, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("kana-converter did not start")
+
+
+def report(mode, runs):
+    cold = runs[0][0][0]
+    totals = [sum(durations) for durations, _ in runs]
+    steady = min(totals[1:]) if len(totals) > 1 else totals[0]
+    rows = runs[0][1]
+    print(f"  {mode:<10} cold_ms={cold:8.1f} first_total_ms={totals[0]:8.1f} "
+          f"steady_total_ms={steady:8.1f} rows/s={rows / steady * 1000:8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare enricher conversion over HTTP vs in-process")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--target", default="fn_to_kana", help="kana-converter entry point for HTTP mode")
+    args = parser.parse_args()
+
+    print(f"rows={sum(len(p) for p, _ in pages(args.page_size))} page_size={args.page_size} "
+          f"batch_size={conversion.ENRICH_CONVERTER_BATCH_SIZE} parallelism={conversion.ENRICH_CONVERTER_PARALLELISM}")
+
+    proc, url = start_converter(args.target)
+    try:
+        conversion.ENRICH_CONVERTER_MODE = "http"
+        conversion.CONVERTER_URL = url
+        report("http", [run(args.page_size) for _ in range(args.repeat)])
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    conversion.ENRICH_CONVERTER_MODE = "inprocess"
+    conversion.CONVERTER_URL = None
+    report("inprocess", [run(args.page_size) for _ in range(args.repeat)])
@@ -0,0 +1,61 @@
+"""
+Sudachi を省略する fast path（カタカナのみ・ひらがなのみの単語）の効果を計測する。
+
+シードデータの全名称について、
+  - fast path で変換された単語の割合（= Sudachi を省略できた割合）
+  - fast path 有効 / 無効での変換結果の一致
+  - fast path 有効 / 無効でのスループット（キャッシュ無効）
+を表示する。
+
+Usage:
+    python benchmarks/bench_fastpath.py [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import corpus
+
+os.environ.update({"KANA_CACHE_SIZE": "0", "KANA_READINGS_DB": ""})
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+sys.path.insert(0, FUNCTION_DIR)
+import converter  # noqa: E402
+
+
+def convert_all(texts, fastpath):
+    converter.KANA_FASTPATH = fastpath
+    return [converter.to_kana(t) for t in texts]
+
+
+def throughput(texts, fastpath, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        convert_all(texts, fastpath)
+    return len(texts) * repeat / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sudachi fast-path benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = sorted(set(corpus.names()))
+    converter.get_tokenizer()
+
+    for key in converter.span_stats:
+        converter.span_stats[key] = 0
+    fast = convert_all(texts, True)
+    spans = dict(converter.span_stats)
+    slow = convert_all(texts, False)
+    mismatches = [(t, a, b) for t, a, b in zip(texts, fast, slow) if a != b]
+
+    total_spans = spans["fastpath"] + spans["sudachi"]
+    print(f"names={len(texts)} word_spans={total_spans}")
+    print(f"  skipped Sudachi: {spans['fastpath']} spans ({spans['fastpath'] / total_spans:.1%})")
+    print(f"  mismatches vs Sudachi-only: {len(mismatches)}")
+    for t, a, b in mismatches[:10]:
+        print(f"    {t}: fastpath={a} sudachi={b}")
+    off = throughput(texts, False, args.repeat)
+    on = throughput(texts, True, args.repeat)
+    print(f"  throughput: off={off:.0f} names/s on={on:.0f} names/s ({on / off:.2f}x)")
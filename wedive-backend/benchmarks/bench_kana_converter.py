@@ -0,0 +1,101 @@
+"""
+kana-converter のスループット・レイテンシベンチマーク。
+
+functions_framework のアプリをプロセス内で起動し（GCP 接続不要）、シードデータから作成した
+コーパス（corpus.py）をバッチサイズ別に POST して以下を表示する。
+  - items/s:        1 秒あたりの変換アイテム数
+  - p50 / p95 / p99: バッチ 1 回あたりのレイテンシ
+  - peak_rss_mb:    計測時点までの最大常駐メモリ
+
+キャッシュ・読みキャッシュは既定で無効化し、トークナイズ自体のコストを計測する。
+--env KEY=VALUE で kana-converter の環境変数（KANA_WORKERS など）を切り替えて比較できる。
+
+Usage:
+    python benchmarks/bench_kana_converter.py [--corpus all ja mixed en] [--batch-sizes 1 10 100 1000]
+        [--items 3000] [--cache] [--env KANA_WORKERS=4] [--json result.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import corpus
+import metrics
+
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+
+
+def create_client(env):
+    os.environ.update(env)
+    sys.path.insert(0, FUNCTION_DIR)
+    from functions_framework import create_app
+
+    app = create_app("fn_to_kana", os.path.join(FUNCTION_DIR, "main.py"))
+    client = app.test_client()
+    client.get("/warmup")
+    return client
+
+
+def make_batches(texts, batch_size, total_items):
+    """コーパスを先頭から順に巡回してバッチを作る（最低 1 バッチ）"""
+    batches = []
+    offset = 0
+    for _ in range(max(1, total_items // batch_size)):
+        batch = []
+        for _ in range(batch_size):
+            batch.append({"id": str(offset), "name": texts[offset % len(texts)]})
+            offset += 1
+        batches.append(batch)
+    return batches
+
+
+def run(client, texts, batch_size, total_items):
+    batches = make_batches(texts, batch_size, total_items)
+    latencies = []
+    started = time.perf_counter()
+    for batch in batches:
+        # 関数側のリクエストごとのログは計測結果の表示に混ざるため捨てる
+        with contextlib.redirect_stdout(io.StringIO()), metrics.stopwatch(latencies):
+            response = client.post("/", json={"items": batch})
+        assert response.status_code == 200, response.data
+    elapsed = time.perf_counter() - started
+    items = sum(len(b) for b in batches)
+    return {
+        "batches": len(batches),
+        "items": items,
+        "items_per_sec": round(items / elapsed, 1),
+        **metrics.latency_summary(latencies),
+        "peak_rss_mb": metrics.peak_rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="kana-converter throughput / latency benchmark")
+    parser.add_argument("--corpus", nargs="+", default=["all", "ja", "mixed", "en", "short", "long"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 10, 100, 1000])
+    parser.add_argument("--items", type=int, default=3000, help="Items per (corpus, batch size)")
+    parser.add_argument("--cache", action="store_true", help="Keep the LRU cache and readings.db enabled")
+    parser.add_argument("--env", action="append", default=[], help="Extra KEY=VALUE for kana-converter")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    env = {} if args.cache else {"KANA_CACHE_SIZE": "0", "KANA_READINGS_DB": ""}
+    env.update(kv.split("=", 1) for kv in args.env)
+    client = create_client(env)
+    corpora = corpus.corpora()
+
+    results = []
+    print(f"{'corpus':<8}{'batch':>7}{'items/s':>11}{'p50':>9}{'p95':>9}{'p99':>9}{'rss_mb':>9}")
+    for name in args.corpus:
+        for batch_size in args.batch_sizes:
+            r = run(client, corpora[name], batch_size, args.items)
+            results.append({"corpus": name, "batch_size": batch_size, **r})
+            print(f"{name:<8}{batch_size:>7}{r['items_per_sec']:>11}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                  f"{r['p99_ms']:>9}{r['peak_rss_mb']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"env": env, "results": results}, f, ensure_ascii=False, indent=2)
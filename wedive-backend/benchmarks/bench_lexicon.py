@@ -0,0 +1,66 @@
+"""
+ドメイン辞書（lexicon.tsv）による Aho-Corasick 事前一致の効果を計測する。
+
+シードデータの全名称について、
+  - ドメイン辞書で解決した単語の割合（= Sudachi に渡さずに済んだ割合）
+  - 辞書有効 / 無効での変換結果の差分（辞書の読みを手で修正した語が反映されているか）
+  - 辞書有効 / 無効でのスループット（キャッシュ無効）
+を表示する。
+
+Usage:
+    python benchmarks/bench_lexicon.py [--repeat 5] [--lexicon PATH]
+"""
+import argparse
+import os
+import sys
+import time
+
+import corpus
+
+os.environ.update({"KANA_CACHE_SIZE": "0", "KANA_READINGS_DB": "", "KANA_LEXICON": "true"})
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+sys.path.insert(0, FUNCTION_DIR)
+import converter  # noqa: E402
+
+
+def convert_all(texts, lexicon):
+    converter.KANA_LEXICON = lexicon
+    return [converter.to_kana(t) for t in texts]
+
+
+def throughput(texts, lexicon, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        convert_all(texts, lexicon)
+    return len(texts) * repeat / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Domain lexicon benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lexicon", default=converter.KANA_LEXICON_PATH, help="Path to lexicon.tsv")
+    args = parser.parse_args()
+
+    converter.KANA_LEXICON_PATH = args.lexicon
+    converter.get_tokenizer()
+    if converter.get_lexicon() is None:
+        sys.exit(f"Lexicon not found: {args.lexicon} (run scripts/build_kana_lexicon.py)")
+
+    texts = sorted(set(corpus.names()))
+    for key in converter.span_stats:
+        converter.span_stats[key] = 0
+    with_lexicon = convert_all(texts, True)
+    spans = dict(converter.span_stats)
+    without_lexicon = convert_all(texts, False)
+    diffs = [(t, a, b) for t, a, b in zip(texts, with_lexicon, without_lexicon) if a != b]
+
+    total_spans = sum(spans.values())
+    print(f"names={len(texts)} lexicon_terms={len(converter.domain_lexicon)} spans={total_spans}")
+    for key, count in spans.items():
+        print(f"  {key}: {count} spans ({count / total_spans:.1%})")
+    print(f"  outputs changed by lexicon: {len(diffs)}")
+    for t, a, b in diffs[:10]:
+        print(f"    {t}: lexicon={a} sudachi={b}")
+    off = throughput(texts, False, args.repeat)
+    on = throughput(texts, True, args.repeat)
+    print(f"  throughput: off={off:.0f} names/s on={on:.0f} names/s ({on / off:.2f}x)")
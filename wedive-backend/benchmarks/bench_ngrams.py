@@ -0,0 +1,60 @@
+"""
+n-gram 検索キー生成（kana-converter の ngrams 表現）のベンチマーク。
+
+シードデータの名称を巡回して N 件（既定 100,000 件）の入力を作り、以下を比較する。
+  - loop:       名称ごとに 1 文字ずつスライスする素朴な実装
+  - batched:    converter.char_ngrams（語単位で n-gram を 1 度だけ生成し、バッチ内で再利用）
+  - end-to-end: 読み取得済みの状態から converter.search_ngrams（正規化 + ローマ字化 + n-gram）
+
+Usage:
+    python benchmarks/bench_ngrams.py [--names 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import corpus
+import metrics
+
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+sys.path.insert(0, FUNCTION_DIR)
+import converter  # noqa: E402
+
+
+def loop_ngrams(texts, sizes=converter.NGRAM_SIZES):
+    grams = set()
+    for text in texts:
+        for n in sizes:
+            for i in range(len(text) - n + 1):
+                grams.add(text[i:i + n])
+    return grams
+
+
+def timed(label, fn, inputs):
+    started = time.perf_counter()
+    total = sum(len(fn(x)) for x in inputs)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12}{elapsed * 1000:>10.1f} ms{len(inputs) / elapsed:>14.0f} names/s{total / len(inputs):>10.1f} grams/name")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="n-gram search key generation benchmark")
+    parser.add_argument("--names", type=int, default=100000)
+    args = parser.parse_args()
+
+    base = corpus.names()
+    # 実データの文字種・長さ分布を保ったまま件数を増やす（末尾の連番で別名にする）
+    names = [f"{base[i % len(base)]} {i // len(base)}" for i in range(args.names)]
+    readings = {text: converter.to_kana(text) for text in set(base)}
+    pairs = [(name, readings[base[i % len(base)]] + f" {i // len(base)}") for i, name in enumerate(names)]
+    words = [converter.normalize_for_search(name) for name in names]
+
+    print(f"names={len(names)}")
+    a = timed("loop", loop_ngrams, words)
+    converter._word_ngrams.cache_clear()
+    b = timed("batched", converter.char_ngrams, words)
+    assert a == b, "batched n-grams differ from the loop implementation"
+    timed("end-to-end", lambda p: converter.search_ngrams(*p), pairs)
+    print(f"peak_rss_mb={metrics.peak_rss_mb()}")
@@ -0,0 +1,94 @@
+"""
+enricher → exporter のパイプライン全体をローカルウェアハウス（SQLite）上の合成データで実行・計測する。
+
+GCP に接続せずに、合成データ（benchmarks/synthetic.py）の *_raw_latest と bigquery/tables・bigquery/views から
+作成した SQLite ファイルに対して、次の順に実行し所要時間を表示する。
+  - build:          合成データ・テーブル・ビューの作成
+  - enrich:         enricher の main（全件が新規。変換はプロセス内モード）
+  - enrich_noop:    2 回目の enricher の main（変更なしの検出のみ）
+  - export:         exporter の main（master.db / JSON を EXPORT_LOCAL_DIR に出力）
+--profile を付けると enrich / export の cProfile 上位（累積時間順）も表示する。
+
+Usage:
+    python benchmarks/bench_pipeline.py [--scale 1] [--reviews-per-point 3] [--logs-per-point 2] [--profile]
+"""
+import argparse
+import cProfile
+import importlib.util
+import io
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+import synthetic
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FUNCTIONS_DIR = os.path.join(BACKEND_DIR, "functions")
+
+
+def load_function(name):
+    """functions/<name>/main.py を別名のモジュールとして読み込む（enricher と exporter はどちらも main.py のため）"""
+    function_dir = os.path.join(FUNCTIONS_DIR, name)
+    sys.path.insert(0, function_dir)
+    spec = importlib.util.spec_from_file_location(f"{name}_main", os.path.join(function_dir, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(label, func, profile, results):
+    profiler = cProfile.Profile() if profile else None
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    func()
+    if profiler:
+        profiler.disable()
+    results[label] = round((time.perf_counter() - started) * 1000, 1)
+    if profiler:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+        print(f"--- profile: {label}\n{out.getvalue()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run enricher and exporter end to end on a local SQLite warehouse")
+    parser.add_argument("--scale", type=int, default=1, help="copies of the seed creatures / locations")
+    parser.add_argument("--reviews-per-point", type=int, default=3)
+    parser.add_argument("--logs-per-point", type=int, default=2)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--keep", help="directory to keep warehouse.db and the export output in")
+    args = parser.parse_args()
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="wedive-pipeline-")
+    os.makedirs(work_dir, exist_ok=True)
+    db_path = os.path.join(work_dir, "warehouse.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    # 各関数はモジュール読み込み時に環境変数を読むため、読み込む前に設定する
+    os.environ.update({
+        "WAREHOUSE": "sqlite", "WAREHOUSE_SQLITE_PATH": db_path, "GCP_PROJECT": "local",
+        "ENRICH_CONVERTER_MODE": "inprocess", "EXPORT_LOCAL_DIR": os.path.join(work_dir, "export"),
+    })
+    enricher = load_function("enricher")
+    exporter = load_function("exporter")
+    from warehouse import SQLiteWarehouse
+
+    results = {}
+    counts = {}
+    timed("build", lambda: counts.update(synthetic.build_warehouse(
+        SQLiteWarehouse(db_path), os.path.join(BACKEND_DIR, "bigquery", "tables"),
+        os.path.join(BACKEND_DIR, "bigquery", "views"), scale=args.scale,
+        reviews_per_point=args.reviews_per_point, logs_per_point=args.logs_per_point)), False, results)
+    print(f"rows: {counts}")
+
+    timed("enrich", lambda: enricher.main(None), args.profile, results)
+    timed("enrich_noop", lambda: enricher.main(None), False, results)
+    timed("export", lambda: exporter.main(None), args.profile, results)
+
+    export_dir = os.path.join(work_dir, "export", "v1", "master")
+    sizes = {f: os.path.getsize(os.path.join(export_dir, f)) for f in ("latest.db.gz", "latest.json.gz")}
+    print(f"timings_ms: {results}")
+    print(f"output: {sizes} ({work_dir})")
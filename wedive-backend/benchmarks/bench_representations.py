@@ -0,0 +1,57 @@
+"""
+複数表現（kana / hiragana / romaji / nfkc）出力のコストを計測する。
+
+  - single-pass: 1 リクエストで複数の表現を要求（トークナイズは 1 回）
+  - separate:    表現ごとに別リクエストを送った場合（トークナイズは表現の数だけ行われる）
+
+kana のみの場合を基準に、表現を 1 つ追加するごとの 1000 件あたりの追加時間を表示する。
+
+Usage:
+    python benchmarks/bench_representations.py [--corpus all] [--batch-size 100] [--items 5000]
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import corpus
+from bench_kana_converter import create_client, make_batches
+
+REPRESENTATION_SETS = [
+    ["kana"],
+    ["kana", "hiragana"],
+    ["kana", "hiragana", "romaji"],
+    ["kana", "hiragana", "romaji", "nfkc"],
+]
+
+
+def elapsed_ms(client, batches, representation_sets):
+    """全バッチを、表現セットごとに 1 リクエストずつ送った合計時間"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for batch in batches:
+            for reps in representation_sets:
+                response = client.post("/", json={"items": batch, "representations": reps})
+                assert response.status_code == 200, response.data
+    return (time.perf_counter() - started) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost of extra output representations")
+    parser.add_argument("--corpus", default="all")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--items", type=int, default=5000)
+    args = parser.parse_args()
+
+    client = create_client({"KANA_CACHE_SIZE": "0", "KANA_READINGS_DB": ""})
+    batches = make_batches(corpus.corpora()[args.corpus], args.batch_size, args.items)
+    items = sum(len(b) for b in batches)
+
+    base_ms = elapsed_ms(client, batches, [["kana"]])
+    print(f"corpus={args.corpus} items={items} batch_size={args.batch_size}")
+    print(f"{'representations':<32}{'single-pass ms/1k':>20}{'separate ms/1k':>18}{'extra/rep ms/1k':>18}")
+    for reps in REPRESENTATION_SETS:
+        single = elapsed_ms(client, batches, [reps]) * 1000 / items
+        separate = elapsed_ms(client, batches, [[r] for r in reps]) * 1000 / items
+        extra = (single - base_ms * 1000 / items) / (len(reps) - 1) if len(reps) > 1 else 0.0
+        print(f"{','.join(reps):<32}{single:>20.1f}{separate:>18.1f}{extra:>18.1f}")
@@ -0,0 +1,77 @@
+"""
+kana-converter の起動性能ベンチマーク。
+
+新しい Python プロセスを起動して以下を計測し、複数回の中央値を表示する。
+  - import_ms:        main.py の import と functions_framework アプリ作成にかかった時間
+  - options_ms:       起動直後の CORS プリフライト (OPTIONS) の応答時間
+  - first_request_ms: 起動後最初の変換リクエストの応答時間（辞書ロードを含む）
+  - steady_p50_ms:    ウォーム状態での変換リクエストの応答時間の中央値
+  - dictionary_load_ms: Sudachi 辞書のロード時間（/healthz の値）
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--requests 50] [--prewarm]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+
+# 計測用の子プロセスで実行するコード（結果は 1 行の JSON で標準出力へ）
+CHILD_CODE = r'''
+import json, sys, time
+started = time.perf_counter()
+from functions_framework import create_app
+app = create_app("fn_to_kana", "main.py")
+import_ms = (time.perf_counter() - started) * 1000
+client = app.test_client()
+
+def timed(fn):
+    t = time.perf_counter()
+    r = fn()
+    assert r.status_code < 300, r.status_code
+    return (time.perf_counter() - t) * 1000
+
+options_ms = timed(lambda: client.options("/"))
+if PREWARM:
+    timed(lambda: client.get("/warmup"))
+names = ["慶良間諸島", "カクレクマノミ", "石垣島・川平", "Manta Scramble", "青の洞窟", "ハナヒゲウツボ"]
+first_request_ms = timed(lambda: client.post("/", json={"items": [{"id": "0", "name": n} for n in names]}))
+steady = [
+    timed(lambda i=i: client.post("/", json={"items": [{"id": str(i), "name": f"{n}{i}"} for n in names]}))
+    for i in range(REQUESTS)
+]
+health = client.get("/healthz").get_json()
+print(json.dumps({
+    "import_ms": import_ms,
+    "options_ms": options_ms,
+    "first_request_ms": first_request_ms,
+    "steady_p50_ms": sorted(steady)[len(steady) // 2],
+    "dictionary_load_ms": health["dictionary_load_ms"],
+}))
+'''
+
+
+def run_once(requests, prewarm):
+    code = CHILD_CODE.replace("PREWARM", str(prewarm)).replace("REQUESTS", str(requests))
+    env = dict(os.environ, KANA_CACHE_SIZE="0", KANA_READINGS_DB="")
+    out = subprocess.run([sys.executable, "-c", code], cwd=FUNCTION_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="kana-converter startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh processes")
+    parser.add_argument("--requests", type=int, default=50, help="Requests for steady-state latency")
+    parser.add_argument("--prewarm", action="store_true", help="Call /warmup before the first request")
+    args = parser.parse_args()
+
+    samples = [run_once(args.requests, args.prewarm) for _ in range(args.runs)]
+    print(f"runs={args.runs} requests={args.requests} prewarm={args.prewarm}")
+    for key in samples[0]:
+        values = [s[key] for s in samples]
+        print(f"  {key:<20} median={statistics.median(values):9.1f}  min={min(values):9.1f}  max={max(values):9.1f}")
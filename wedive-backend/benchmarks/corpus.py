@@ -0,0 +1,92 @@
+"""
+ベンチマーク用のコーパス（生物名・地名）を wedive-web のシードデータから作成する。
+
+`wedive-web/src/data/*_seed.json` が空の場合は `backup_20251221/` 配下のスナップショットを使用する。
+"""
+import json
+import os
+import re
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "wedive-web", "src", "data")
+SEED_DIRS = [DATA_DIR, os.path.join(DATA_DIR, "backup_20251221")]
+
+CREATURE_FIELDS = ["name", "scientificName", "englishName", "family", "category"]
+
+ASCII_RE = re.compile(r'^[\x00-\x7F]+$')
+LATIN_RE = re.compile(r'[A-Za-z]')
+
+
+def load_seed(filename):
+    """空でない最初のシードファイルを読み込む"""
+    for seed_dir in SEED_DIRS:
+        path = os.path.join(seed_dir, filename)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data:
+                return data
+    raise FileNotFoundError(f"No non-empty {filename} under {SEED_DIRS}")
+
+
+def creature_rows():
+    """生物シードを enricher が送るのと同じ形式（id + 変換対象フィールド）で返す"""
+    return [
+        {"id": c["id"], **{f: c[f] for f in CREATURE_FIELDS if isinstance(c.get(f), str)}}
+        for c in load_seed("creatures_seed.json")
+    ]
+
+
+def _walk_locations(node, area=None):
+    """Region > Zone > Area > Point の木を辿る（type を持たない葉がポイント）"""
+    node_id = node.get("id", node["name"])
+    if not node.get("type") and not node.get("children"):
+        yield {"id": node_id, "name": node["name"], "area": area}
+        return
+    level = node.get("type") or "Area"
+    yield {"id": node_id, "name": node["name"], "level": level}
+    for child in node.get("children", []):
+        yield from _walk_locations(child, node["name"] if level == "Area" else area)
+
+
+def point_rows():
+    """地名シードからポイント（name, area）と地理階層（region / zone / area）の行を返す"""
+    points, geography = [], []
+    for root in load_seed("locations_seed.json"):
+        for row in _walk_locations(root):
+            (geography if "level" in row else points).append(row)
+    return points, geography
+
+
+def names():
+    """変換対象となりうる全ての名称（重複あり。実データの出現頻度を保つ）"""
+    values = [v for row in creature_rows() for k, v in row.items() if k != "id"]
+    points, geography = point_rows()
+    values += [v for row in points for k, v in row.items() if k != "id" and v]
+    values += [row["name"] for row in geography]
+    return values
+
+
+def classify(text):
+    if ASCII_RE.match(text):
+        return "en"
+    if LATIN_RE.search(text):
+        return "mixed"
+    return "ja"
+
+
+def length_bucket(text):
+    if len(text) <= 6:
+        return "short"
+    if len(text) <= 15:
+        return "medium"
+    return "long"
+
+
+def corpora():
+    """全体（all）、文字種別（ja / mixed / en）、長さ別（short / medium / long）のコーパスを返す"""
+    values = names()
+    result = {"all": values}
+    for text in values:
+        result.setdefault(classify(text), []).append(text)
+        result.setdefault(length_bucket(text), []).append(text)
+    return result
@@ -0,0 +1,37 @@
+"""ベンチマーク共通の計測ヘルパー"""
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+
+def percentile(values, p):
+    """最近傍順位法によるパーセンタイル（values は未ソートで可）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies_ms):
+    return {
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+    }
+
+
+def peak_rss_mb():
+    """プロセス開始以降の最大常駐メモリ（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS は byte 単位
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def stopwatch(samples):
+    """with ブロックの経過時間（ms）を samples に追加する"""
+    started = time.perf_counter()
+    yield
+    samples.append((time.perf_counter() - started) * 1000)
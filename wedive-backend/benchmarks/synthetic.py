@@ -0,0 +1,112 @@
+"""
+ローカルウェアハウス（functions/shared/warehouse.py の SQLiteWarehouse）用の合成データ。
+
+シードデータの生物・地理階層（Region > Zone > Area > Point）を scale 倍に複製し、
+レビュー・ログ・ポイント別生物・ユーザー・指導団体を乱数（固定シード）で生成して、
+Firestore と同じ形の (document_id, data) を *_raw_latest テーブルごとに返す。
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+import corpus
+
+RAW_TABLES = [
+    "creatures_raw_latest", "points_raw_latest", "areas_raw_latest", "zones_raw_latest", "regions_raw_latest",
+    "point_creatures_raw_latest", "reviews_raw_latest", "users_raw_latest", "logs_raw_latest",
+    "agencies_raw_latest",
+]
+STATUSES = ["approved"] * 9 + ["pending"]
+RARITIES = ["Common", "Rare", "Epic", "Legendary"]
+COMMENTS = ["透明度が良く、群れが見られた。", "流れが強めだった。", "マクロ生物が多い。", None]
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def _timestamp(rng):
+    return (BASE_TIME + timedelta(minutes=rng.randrange(365 * 24 * 60))).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _geography(copy):
+    """地理階層とポイントのドキュメントを返す（copy > 0 は id に接尾辞を付けた複製）"""
+    suffix = f"_{copy}" if copy else ""
+    docs = {"regions_raw_latest": [], "zones_raw_latest": [], "areas_raw_latest": [], "points_raw_latest": []}
+    for region in corpus.load_seed("locations_seed.json"):
+        region_id = region["id"] + suffix
+        docs["regions_raw_latest"].append((region_id, {"name": region["name"], "status": "approved"}))
+        for zone in region.get("children", []):
+            zone_id = zone["id"] + suffix
+            docs["zones_raw_latest"].append((zone_id, {
+                "name": zone["name"], "description": zone.get("description"), "regionId": region_id,
+                "status": "approved"}))
+            for area in zone.get("children", []):
+                area_id = area["id"] + suffix
+                docs["areas_raw_latest"].append((area_id, {
+                    "name": area["name"], "description": area.get("description"), "zoneId": zone_id,
+                    "regionId": region_id, "status": "approved"}))
+                for point in area.get("children", []):
+                    docs["points_raw_latest"].append((point["id"] + suffix, {
+                        "name": point["name"], "description": point.get("desc"),
+                        "region": region["name"], "zone": zone["name"], "area": area["name"],
+                        "regionId": region_id, "zoneId": zone_id, "areaId": area_id,
+                        "coordinates": {"lat": point.get("latitude"), "lng": point.get("longitude")},
+                        "maxDepth": 30, "level": "Beginner", "status": "approved"}))
+    return docs
+
+
+def documents(scale=1, reviews_per_point=3, logs_per_point=2, creatures_per_point=5, seed=0):
+    """テーブル名 -> [(document_id, data), ...] を返す"""
+    rng = random.Random(seed)
+    tables = {name: [] for name in RAW_TABLES}
+    # シードには同じ id の生物が含まれるため、Firestore の上書きと同じく後のものを残す
+    creatures = list({c["id"]: c for c in corpus.load_seed("creatures_seed.json")}.values())
+
+    for copy in range(scale):
+        suffix = f"_{copy}" if copy else ""
+        for creature in creatures:
+            data = {k: v for k, v in creature.items() if k != "id"}
+            tables["creatures_raw_latest"].append((creature["id"] + suffix, data))
+        for name, docs in _geography(copy).items():
+            tables[name].extend(docs)
+
+    user_ids = [f"u_{i:06d}" for i in range(max(10, len(tables["points_raw_latest"]) // 10))]
+    for user_id in user_ids:
+        tables["users_raw_latest"].append((user_id, {"displayName": f"diver{user_id[2:]}", "photoURL": None}))
+    for i in range(5):
+        tables["agencies_raw_latest"].append((f"ag_{i}", {
+            "name": f"Agency {i}", "ranks": [{"id": "ow", "name": "Open Water"}], "createdAt": _timestamp(rng)}))
+
+    creature_ids = [doc_id for doc_id, _ in tables["creatures_raw_latest"]]
+    for point_id, point in tables["points_raw_latest"]:
+        for creature_id in rng.sample(creature_ids, min(creatures_per_point, len(creature_ids))):
+            tables["point_creatures_raw_latest"].append((f"{point_id}_{creature_id}", {
+                "pointId": point_id, "creatureId": creature_id, "localRarity": rng.choice(RARITIES),
+                "confidence": round(rng.random(), 2), "status": rng.choice(STATUSES)}))
+        for i in range(reviews_per_point):
+            tables["reviews_raw_latest"].append((f"rv_{point_id}_{i}", {
+                "pointId": point_id, "areaId": point["areaId"], "zoneId": point["zoneId"],
+                "regionId": point["regionId"], "userId": rng.choice(user_ids), "rating": rng.randint(1, 5),
+                "metrics": {"visibility": rng.randint(3, 30)},
+                "radar": {k: rng.randint(1, 5) for k in
+                          ("visibility", "encounter", "excite", "macro", "topography", "comfort", "satisfaction")},
+                "tags": ["群れ"], "helpfulCount": rng.randint(0, 10), "comment": rng.choice(COMMENTS),
+                "createdAt": _timestamp(rng), "status": rng.choice(STATUSES)}))
+        for i in range(logs_per_point):
+            tables["logs_raw_latest"].append((f"log_{point_id}_{i}", {
+                "userId": rng.choice(user_ids), "date": _timestamp(rng)[:10], "diveNumber": rng.randint(1, 500),
+                "location": {"pointId": point_id, "pointName": point["name"]},
+                "depth": {"max": rng.randint(5, 40)}, "comment": rng.choice(COMMENTS),
+                "isPrivate": rng.random() < 0.2, "likeCount": rng.randint(0, 20), "createdAt": _timestamp(rng)}))
+    return tables
+
+
+def build_warehouse(warehouse, tables_dir, views_dir, **kwargs):
+    """合成データの *_raw_latest、bigquery/tables のテーブル、bigquery/views のビューを作成し、件数を返す"""
+    counts = {}
+    for name, docs in documents(**kwargs).items():
+        warehouse.create_raw_table(name)
+        warehouse.insert_documents(name, docs)
+        counts[name] = len(docs)
+    for filename in sorted(f for f in os.listdir(tables_dir) if f.endswith(".sql")):
+        warehouse.apply_sql_file(os.path.join(tables_dir, filename))
+    warehouse.create_views(views_dir)
+    return counts
@@ -1,26 +1,43 @@
-
 -- ポイント情報の増分エンリッチメント
+-- fn_to_kana（Remote Function）は、変換が必要な行の重複を除いた name ごとに 1 回だけ呼び出す。
+-- 読みは一時テーブルに確定させてから MERGE で結合する（CTE は参照箇所ごとに再評価される場合があるため）。
+-- 呼び出し回数: 変更前は変換が必要な行 × 2（name_kana と search_text）、変更後はその行の name の種類数
+-- （scripts/measure_enrich_sql_calls.py で確認できる）
+
+-- 変換が必要な行（新規・名前の変更・search_text 未作成）
+CREATE TEMP TABLE points_changed AS
+SELECT
+  s.document_id AS id,
+  JSON_VALUE(s.data, '$.name') AS name,
+  JSON_VALUE(s.data, '$.area') AS area_name
+FROM `${PROJECT_ID}.${DATASET}.points_raw_latest` s
+LEFT JOIN `${PROJECT_ID}.${DATASET}.points_enriched` t ON s.document_id = t.id
+WHERE t.id IS NULL OR t.name != JSON_VALUE(s.data, '$.name') OR t.search_text IS NULL;
+
+-- name ごとに 1 回だけ変換
+CREATE TEMP TABLE points_kana AS
+SELECT name, `${PROJECT_ID}.${DATASET}.fn_to_kana`(name) AS name_kana
+FROM (SELECT DISTINCT name FROM points_changed WHERE name IS NOT NULL);
+
 MERGE `${PROJECT_ID}.${DATASET}.points_enriched` t
 USING (
-  SELECT
-    document_id AS id,
-    JSON_VALUE(data, '$.name') AS name,
-    JSON_VALUE(data, '$.area') AS area_name
-  FROM `${PROJECT_ID}.${DATASET}.points_raw_latest`
+  SELECT c.id, c.name, c.area_name, k.name_kana
+  FROM points_changed c
+  LEFT JOIN points_kana k ON c.name = k.name
 ) s
 ON t.id = s.id
-WHEN MATCHED AND (t.name != s.name OR t.search_text IS NULL) THEN
+WHEN MATCHED THEN
   UPDATE SET
     name = s.name,
-    name_kana = `${PROJECT_ID}.${DATASET}.fn_to_kana`(s.name),
-    search_text = CONCAT(s.name, ' ', `${PROJECT_ID}.${DATASET}.fn_to_kana`(s.name), ' ', IFNULL(s.area_name, '')),
+    name_kana = s.name_kana,
+    search_text = CONCAT(s.name, ' ', s.name_kana, ' ', IFNULL(s.area_name, '')),
     updated_at = CURRENT_TIMESTAMP()
 WHEN NOT MATCHED THEN
   INSERT (id, name, name_kana, search_text, updated_at)
   VALUES (
     s.id,
     s.name,
-    `${PROJECT_ID}.${DATASET}.fn_to_kana`(s.name),
-    CONCAT(s.name, ' ', `${PROJECT_ID}.${DATASET}.fn_to_kana`(s.name), ' ', IFNULL(s.area_name, '')),
+    s.name_kana,
+    CONCAT(s.name, ' ', s.name_kana, ' ', IFNULL(s.area_name, '')),
     CURRENT_TIMESTAMP()
   );
@@ -0,0 +1,14 @@
+
+-- kana-converter を BigQuery Remote Function として登録する
+-- BigQuery は最大 max_batching_rows 行を 1 回の HTTP 呼び出し（{"calls": [[text], ...]}）にまとめて送る。
+-- kana-converter 側でバッチ内の重複排除を行う。件数・文字数によるチャンク分割は KANA_WORKERS 指定時
+-- （プロセスプール）のみで、既定（KANA_WORKERS=0）は 1 リクエストを逐次変換する。
+-- max_batching_rows は逐次変換で 1 リクエストが処理できる件数に合わせる
+-- （重複なしの 5000 行・約 14 万文字をキャッシュ無しで約 0.2 秒。1 CPU でのローカル計測）。
+CREATE OR REPLACE FUNCTION `${PROJECT_ID}.${DATASET}.fn_to_kana`(text STRING) RETURNS STRING
+REMOTE WITH CONNECTION `${PROJECT_ID}.${LOCATION}.${BQ_CONNECTION}`
+OPTIONS (
+  endpoint = '${CONVERTER_URL}',
+  max_batching_rows = 5000,
+  user_defined_context = [("representation", "kana")]
+);
@@ -12,5 +12,12 @@ CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.creatures_enriched` (
     category STRING,
     category_kana STRING,
     search_text STRING,
+    search_ngrams STRING,
+    source_fingerprint INT64,
     updated_at TIMESTAMP
 );
+
+-- 既存テーブルへのカラム追加
+ALTER TABLE `${PROJECT_ID}.${DATASET}.creatures_enriched`
+    ADD COLUMN IF NOT EXISTS search_ngrams STRING,
+    ADD COLUMN IF NOT EXISTS source_fingerprint INT64;
@@ -0,0 +1,8 @@
+
+-- エンリッチャーがテーブルごとに処理済みの changelog の timestamp を保存する
+-- watermark は UTC の 'YYYY-MM-DDTHH:MM:SS.ffffff'。行を削除するとそのテーブルは次回全件で再照合される
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.enrich_watermarks` (
+    source_table STRING,
+    watermark STRING,
+    updated_at TIMESTAMP
+);
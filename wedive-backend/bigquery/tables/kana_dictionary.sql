@@ -0,0 +1,9 @@
+
+-- テーブル横断の読み辞書（エンリッチャーが先に引き、新しい読みを書き戻す）
+-- text は NFKC・空白を正規化した原文、reading はその読み。kana-converter の辞書・ドメイン辞書を更新した場合は TRUNCATE して作り直す
+-- 登録するのは ENRICH_REGISTRY の dictionary_fields（語彙の小さいフィールド）の値のみ
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.kana_dictionary` (
+    text STRING,
+    reading STRING,
+    updated_at TIMESTAMP
+);
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.regions_enriched` (
+    id STRING,
+    name STRING,
+    name_kana STRING,
+    search_text STRING,
+    search_ngrams STRING,
+    source_fingerprint INT64,
+    updated_at TIMESTAMP
+);
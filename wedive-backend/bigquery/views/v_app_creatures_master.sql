@@ -23,6 +23,7 @@ SELECT
   JSON_VALUE(c.data, '$.imageLicense') AS image_license,
   JSON_VALUE(c.data, '$.imageKeyword') AS image_keyword,
   e.search_text,
+  e.search_ngrams,
   JSON_VALUE(c.data, '$.status') AS status,
   JSON_VALUE(c.data, '$.createdAt') AS created_at,
   JSON_VALUE(c.data, '$.updatedAt') AS updated_at
@@ -12,7 +12,16 @@ SELECT
   JSON_VALUE(r.data, '$.name') AS region_name,
   JSON_VALUE(r.data, '$.description') AS region_description,
   JSON_VALUE(r.data, '$.status') AS region_status,
-  CONCAT(JSON_VALUE(r.data, '$.name'), ' > ', JSON_VALUE(z.data, '$.name'), ' > ', JSON_VALUE(a.data, '$.name')) AS full_path
+  CONCAT(JSON_VALUE(r.data, '$.name'), ' > ', JSON_VALUE(z.data, '$.name'), ' > ', JSON_VALUE(a.data, '$.name')) AS full_path,
+  -- エンリッチ済みテーブルからカナを取得
+  ea.name_kana AS area_name_kana,
+  ez.name_kana AS zone_name_kana,
+  er.name_kana AS region_name_kana,
+  -- 各階層の名称とカナを結合した検索用テキスト（エリア > ゾーン > リージョンの順）
+  TRIM(CONCAT(IFNULL(ea.search_text, ''), ' ', IFNULL(ez.search_text, ''), ' ', IFNULL(er.search_text, ''))) AS search_text
 FROM `${PROJECT_ID}.${DATASET}`.areas_raw_latest a
 LEFT JOIN `${PROJECT_ID}.${DATASET}`.zones_raw_latest z ON JSON_VALUE(a.data, '$.zoneId') = z.document_id
 LEFT JOIN `${PROJECT_ID}.${DATASET}`.regions_raw_latest r ON JSON_VALUE(z.data, '$.regionId') = r.document_id
+LEFT JOIN `${PROJECT_ID}.${DATASET}`.areas_enriched ea ON a.document_id = ea.id
+LEFT JOIN `${PROJECT_ID}.${DATASET}`.zones_enriched ez ON z.document_id = ez.id
+LEFT JOIN `${PROJECT_ID}.${DATASET}`.regions_enriched er ON r.document_id = er.id
@@ -41,6 +41,7 @@ SELECT
   JSON_QUERY(p.data, '$.actualStats') AS actual_stats_json,
   -- メタデータ
   e.search_text AS search_text,
+  e.search_ngrams AS search_ngrams,
   JSON_VALUE(p.data, '$.status') AS status,
   JSON_VALUE(p.data, '$.createdAt') AS created_at,
   JSON_VALUE(p.data, '$.updatedAt') AS updated_at
@@ -35,11 +35,22 @@ for file in bigquery/tables/*.sql; do
 done
 
 # 2. Deploy Kana Converter (Standard Web API)
+# 任意: エンリッチ済みテーブルから読みキャッシュ (readings.db) を作成して同梱する
+if [ "$BUILD_KANA_READINGS" = "true" ]; then
+    echo "Building kana reading cache..."
+    python3 scripts/build_kana_readings.py --project $PROJECT_ID --dataset $DATASET \
+        --output functions/kana-converter/readings.db || echo "Skipped reading cache (build failed)"
+fi
+# 任意: KANA_ASYNC=true で ASGI 版を 1 インスタンス複数リクエスト同時処理でデプロイする
+KANA_DEPLOY_FLAGS="--entry-point=fn_to_kana"
+if [ "$KANA_ASYNC" = "true" ]; then
+    KANA_DEPLOY_FLAGS="--entry-point=fn_to_kana_async --concurrency=${KANA_CONCURRENCY:-32} --cpu=1"
+fi
 echo "Deploying kana-converter function..."
 cd functions/kana-converter
 gcloud functions deploy kana-converter \
     --gen2 \
-    --entry-point=fn_to_kana \
+    $KANA_DEPLOY_FLAGS \
     --runtime=python310 \
     --region=$LOCATION \
     --trigger-http \
@@ -50,9 +61,40 @@ gcloud functions deploy kana-converter \
 export CONVERTER_URL=$(gcloud functions describe kana-converter --project=$PROJECT_ID --region=$LOCATION --gen2 --format='value(serviceConfig.uri)')
 cd ../..
 
+# 任意: kana-converter を BigQuery Remote Function (fn_to_kana) として登録する
+if [ "$DEPLOY_REMOTE_FUNCTION" = "true" ]; then
+    export BQ_CONNECTION=${BQ_CONNECTION:-kana-converter}
+    echo "Deploying BigQuery remote functions (connection: $BQ_CONNECTION)..."
+    bq mk --connection --location=$LOCATION --project_id=$PROJECT_ID \
+        --connection_type=CLOUD_RESOURCE $BQ_CONNECTION || true
+    for file in bigquery/functions/*.sql; do
+        echo "Creating FUNCTION: $(basename "$file" .sql)"
+        sql_content=$(envsubst < "$file")
+        bq query --use_legacy_sql=false "$sql_content"
+    done
+fi
+
 # 3. Deploy Enricher (Scheduled Job)
+# 任意: ENRICH_IN_PROCESS=true で kana-converter の変換ロジックを同梱し、HTTP を介さずに変換する（CONVERTER_URL はフォールバック）
+ENRICH_MEMORY=512Mi
+ENRICH_CONVERTER_MODE=http
+# ウェアハウスの抽象化（functions/shared/warehouse.py）は enricher / exporter の両方に同梱する
+cp functions/shared/warehouse.py functions/enricher/
+if [ "$ENRICH_IN_PROCESS" = "true" ]; then
+    cp functions/kana-converter/converter.py functions/kana-converter/lexicon.py functions/kana-converter/lexicon.tsv functions/enricher/
+    if [ -f functions/kana-converter/readings.db ]; then
+        cp functions/kana-converter/readings.db functions/enricher/
+    fi
+    ENRICH_MEMORY=1Gi
+    ENRICH_CONVERTER_MODE=inprocess
+fi
 echo "Deploying master-data-enricher function..."
 cd functions/enricher
+# Sudachi は同梱する場合のみインストールする（デプロイ後に requirements.txt を元に戻す）
+if [ "$ENRICH_IN_PROCESS" = "true" ]; then
+    cp requirements.txt requirements.txt.orig
+    grep -v '^#' requirements-inprocess.txt >> requirements.txt
+fi
 gcloud functions deploy master-data-enricher \
     --gen2 \
     --entry-point=main \
@@ -60,8 +102,12 @@ gcloud functions deploy master-data-enricher \
     --region=$LOCATION \
     --trigger-http \
     --project=$PROJECT_ID \
-    --memory=512Mi \
-    --set-env-vars GCP_PROJECT=$PROJECT_ID,BQ_DATASET=$DATASET,CONVERTER_URL=$CONVERTER_URL
+    --memory=$ENRICH_MEMORY \
+    --timeout=300s \
+    --set-env-vars GCP_PROJECT=$PROJECT_ID,BQ_DATASET=$DATASET,CONVERTER_URL=$CONVERTER_URL,ENRICH_CONVERTER_MODE=$ENRICH_CONVERTER_MODE
+if [ -f requirements.txt.orig ]; then
+    mv requirements.txt.orig requirements.txt
+fi
 cd ../..
 
 # 4. Deploy VIEWs
@@ -77,6 +123,7 @@ done
 
 # 5. Deploy Exporter
 echo "Deploying master-data-exporter function..."
+cp functions/shared/warehouse.py functions/exporter/
 cd functions/exporter
 gcloud functions deploy master-data-exporter \
     --gen2 \
@@ -0,0 +1,130 @@
+"""
+Firestore → BigQuery 拡張機能の changelog（*_raw_changelog）を使った差分エンリッチ
+
+テーブルごとに処理済みの changelog の timestamp（watermark）を enrich_watermarks に保存し、
+次回は watermark 以降に書き込まれた changelog の行（ドキュメントごとに最新のもの）だけを読む。
+最新の操作が DELETE のドキュメントはエンリッチ済みテーブルから削除する。
+watermark が無いテーブルと、再照合（reconcile）を指定した場合は *_raw_latest の全件を対象にし、
+元データに存在しない id もエンリッチ済みテーブルから削除する。
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+# watermark 以降の changelog だけを対象にする（false の場合は毎回 *_raw_latest の全件を対象にする）
+ENRICH_INCREMENTAL = os.environ.get("ENRICH_INCREMENTAL", "true").lower() == "true"
+# 常に全件で再照合する（リクエストの ?mode=reconcile でも指定できる）
+ENRICH_RECONCILE = os.environ.get("ENRICH_RECONCILE", "false").lower() == "true"
+# watermark より前から読み直す秒数（ストリーミング挿入の遅延で後から届いた行を取りこぼさないため。
+# 読み直した行のうち変更の無いものはフィンガープリントの比較で除外される）
+ENRICH_WATERMARK_LAG_SEC = float(os.environ.get("ENRICH_WATERMARK_LAG_SEC", "600"))
+WATERMARK_TABLE = "enrich_watermarks"
+
+
+def changelog_table(source_table):
+    """points_raw_latest -> points_raw_changelog"""
+    return source_table[:-len("_raw_latest")] + "_raw_changelog"
+
+
+def to_iso(value):
+    """BigQuery の TIMESTAMP（datetime）/ SQLite の文字列を、UTC の 'YYYY-MM-DDTHH:MM:SS.ffffff' に揃える"""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+def source_rows_sql(warehouse, source_table, window=None):
+    """エンリッチ対象のドキュメント（document_id, data）を返すサブクエリ
+    window=(since, until) の場合は、その期間に changelog に書き込まれたドキュメントの最新の状態（削除を除く）
+    """
+    if window is None:
+        return f"SELECT document_id, data FROM {warehouse.table(source_table)}"
+    return f"SELECT document_id, data FROM ({latest_changes_sql(warehouse, source_table, window)}) WHERE operation != 'DELETE'"
+
+
+def latest_changes_sql(warehouse, source_table, window):
+    since, until = window
+    return f"""
+        SELECT document_id, operation, data FROM (
+            SELECT document_id, operation, data,
+                   ROW_NUMBER() OVER (PARTITION BY document_id ORDER BY timestamp DESC, event_id DESC) AS rn
+            FROM {warehouse.table(changelog_table(source_table))}
+            WHERE timestamp > TIMESTAMP('{since}') AND timestamp <= TIMESTAMP('{until}')
+        ) WHERE rn = 1"""
+
+
+def latest_timestamp(warehouse, source_table):
+    """changelog の最新の timestamp（今回の処理範囲の上限）"""
+    rows, _ = warehouse.query_rows(
+        f"SELECT MAX(timestamp) AS max_ts FROM {warehouse.table(changelog_table(source_table))}", label=source_table)
+    return to_iso(rows[0]["max_ts"])
+
+
+def delete_removed(warehouse, source_table, enriched_table, window=None):
+    """削除されたドキュメントをエンリッチ済みテーブルから削除し、件数を返す
+    window 指定時はその期間の最新の操作が DELETE のもの、未指定時は *_raw_latest に存在しないもの。
+    いずれもエンリッチ済みテーブルに残っている id のみを対象にする（watermark の重なりで読み直した削除済みの
+    ドキュメントに DELETE を再実行・再計上しないため）
+    """
+    if window is None:
+        query = f"""
+            SELECT t.id FROM {warehouse.table(enriched_table)} t
+            LEFT JOIN {warehouse.table(source_table)} s ON t.id = s.document_id
+            WHERE s.document_id IS NULL"""
+    else:
+        query = f"""
+            SELECT t.id FROM ({latest_changes_sql(warehouse, source_table, window)}) c
+            JOIN {warehouse.table(enriched_table)} t ON c.document_id = t.id
+            WHERE c.operation = 'DELETE'"""
+    rows, _ = warehouse.query_rows(query, label=source_table)
+    ids = [row["id"] for row in rows]
+    if ids:
+        warehouse.delete(enriched_table, "id", ids, label=source_table)
+        print(f"Deleted {len(ids)} records from {enriched_table} (removed from {source_table}).")
+    return len(ids)
+
+
+class Watermarks:
+    """テーブルごとの watermark（enrich_watermarks）。更新は実行の最後にまとめて書き込む"""
+
+    def __init__(self, warehouse):
+        self.warehouse = warehouse
+        rows, _ = warehouse.query_rows(
+            f"SELECT source_table, watermark FROM {warehouse.table(WATERMARK_TABLE)}", label=WATERMARK_TABLE)
+        self.values = {row["source_table"]: row["watermark"] for row in rows}
+        self.updated = {}
+
+    def window(self, source_table, until):
+        """前回の watermark（から ENRICH_WATERMARK_LAG_SEC 前）〜 until。watermark が無ければ None"""
+        since = self.values.get(source_table)
+        if since is None:
+            return None
+        since = datetime.fromisoformat(since) - timedelta(seconds=ENRICH_WATERMARK_LAG_SEC)
+        return since.strftime("%Y-%m-%dT%H:%M:%S.%f"), until
+
+    def set(self, source_table, value):
+        if self.values.get(source_table) != value:
+            self.updated[source_table] = value
+
+    def flush(self):
+        rows = [{"source_table": table, "watermark": value} for table, value in self.updated.items()]
+        if rows:
+            self.warehouse.load_rows(f"tmp_{WATERMARK_TABLE}", rows, label=WATERMARK_TABLE)
+            self.warehouse.merge(WATERMARK_TABLE, f"tmp_{WATERMARK_TABLE}", "source_table", ["watermark"])
+        self.values.update(self.updated)
+        self.updated = {}
+        return len(rows)
+
+
+def open_watermarks(warehouse):
+    """watermark を読み込む。差分エンリッチが無効な場合・テーブルが無い場合は None"""
+    if not ENRICH_INCREMENTAL:
+        return None
+    try:
+        return Watermarks(warehouse)
+    except Exception as e:
+        print(f"Watermarks unavailable, scanning *_raw_latest in full: {e}")
+        return None
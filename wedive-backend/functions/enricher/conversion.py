@@ -0,0 +1,253 @@
+"""
+エンリッチャーの変換処理（kana-converter の呼び出しと検索用フィールドの構築）
+
+ENRICH_CONVERTER_MODE=inprocess の場合は kana-converter の変換ロジック（converter.py）をこのプロセス内で直接呼び出し、
+HTTP の往復・JSON の二重シリアライズ・kana-converter 側のコールドスタートを省く。
+converter.py が読み込めない場合や変換に失敗した場合は、CONVERTER_URL が設定されていれば HTTP にフォールバックする。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONVERTER_URL = os.environ.get("CONVERTER_URL") # kana-converter のエンドポイント
+# 検索用 n-gram キー（search_ngrams）を生成・保存する
+ENRICH_NGRAMS = os.environ.get("ENRICH_NGRAMS", "false").lower() == "true"
+# 変換の実行方法（http: kana-converter を HTTP で呼ぶ / inprocess: converter.py をプロセス内で呼ぶ）
+ENRICH_CONVERTER_MODE = os.environ.get("ENRICH_CONVERTER_MODE", "http")
+# 1 ページを分割して kana-converter へ送る 1 リクエストあたりの件数と、テーブルごとの同時リクエスト数
+ENRICH_CONVERTER_BATCH_SIZE = int(os.environ.get("ENRICH_CONVERTER_BATCH_SIZE", "250"))
+ENRICH_CONVERTER_PARALLELISM = int(os.environ.get("ENRICH_CONVERTER_PARALLELISM", "4"))
+# HTTP 接続プールの大きさ（同時にエンリッチするテーブル数 × テーブルごとの同時リクエスト数）
+HTTP_POOL_SIZE = max(1, int(os.environ.get("ENRICH_TABLE_PARALLELISM", "2")) * ENRICH_CONVERTER_PARALLELISM)
+# リクエストの件数を直近の 1 件あたりの所要時間から調整し、1 リクエストが目標時間に収まるようにする
+# （ENRICH_CONVERTER_BATCH_SIZE は初期値になる）
+ENRICH_ADAPTIVE_BATCH = os.environ.get("ENRICH_ADAPTIVE_BATCH", "true").lower() == "true"
+ENRICH_CONVERTER_TARGET_SEC = float(os.environ.get("ENRICH_CONVERTER_TARGET_SEC", "5"))
+ENRICH_CONVERTER_MIN_BATCH = int(os.environ.get("ENRICH_CONVERTER_MIN_BATCH", "10"))
+ENRICH_CONVERTER_MAX_BATCH = int(os.environ.get("ENRICH_CONVERTER_MAX_BATCH", "1000"))
+ENRICH_CONVERTER_TIMEOUT_SEC = float(os.environ.get("ENRICH_CONVERTER_TIMEOUT_SEC", "60"))
+# 失敗したリクエストを二分して再送し、単独で再送しても失敗するレコード（poison row）だけを今回の MERGE から外す
+ENRICH_BISECT = os.environ.get("ENRICH_BISECT", "true").lower() == "true"
+# 1 件だけのリクエストが成功を挟まずにこの回数を超えて失敗した場合は kana-converter の障害とみなし、ページの変換を中断する
+ENRICH_CONVERTER_MAX_FAILURES = int(os.environ.get("ENRICH_CONVERTER_MAX_FAILURES", "3"))
+
+# deploy.sh はデプロイ時に converter.py 等をこのディレクトリへコピーする。ローカル実行時は隣の kana-converter を参照する
+KANA_CONVERTER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "kana-converter")
+
+# kana-converter への HTTP 接続はテーブル・リクエストをまたいで使い回す
+_session = None
+_session_lock = threading.Lock()
+# プロセス内変換用のモジュール（未ロードは None、ロード失敗は False）
+_converter = None
+_converter_lock = threading.Lock()
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE))
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE))
+                _session = session
+    return _session
+
+def get_inprocess_converter():
+    """プロセス内変換用の converter モジュールを返す（読み込めない場合は None）"""
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                try:
+                    try:
+                        import converter
+                    except ImportError:
+                        sys.path.append(KANA_CONVERTER_DIR)
+                        import converter
+                    converter.preload()
+                    _converter = converter
+                except Exception as e:
+                    print(f"In-process converter unavailable: {e}")
+                    _converter = False
+    return _converter or None
+
+def representations():
+    return ["kana", "ngrams"] if ENRICH_NGRAMS else ["kana"]
+
+class ConverterBatcher:
+    """kana-converter へのリクエストの件数調整・失敗時の二分再送・リクエストごとのレイテンシ記録
+    テーブルごとに 1 つ作り、ページをまたいで 1 件あたりの所要時間を引き継ぐ
+    """
+
+    def __init__(self, name="converter", deadline=None):
+        self.name = name
+        self.deadline = deadline
+        self.batch_size = ENRICH_CONVERTER_BATCH_SIZE
+        self.item_sec = None  # 1 件あたりの所要時間（指数移動平均）
+        self.latencies_ms = []
+        self.failures = 0
+        self.consecutive_failures = 0
+        # ページをまたいで同じ poison row を読み直すため、id の集合で数える
+        self.poison_ids = set()
+        self._lock = threading.Lock()
+
+    def record(self, size, elapsed_sec, error=None, will_retry=False):
+        """1 リクエストの結果を記録し、次のリクエストの件数を決める（ログには 1 行の JSON で出力する）
+        will_retry: 同じアイテムを再送する失敗（連続失敗の回数には数えない）
+        """
+        with self._lock:
+            self.latencies_ms.append(elapsed_sec * 1000)
+            if error is None:
+                self.consecutive_failures = 0
+                if ENRICH_ADAPTIVE_BATCH:
+                    per_item = elapsed_sec / size
+                    self.item_sec = per_item if self.item_sec is None else 0.7 * self.item_sec + 0.3 * per_item
+                    # 1 回で増やすのは 2 倍まで（1 回の速い応答で目標時間を大きく超えないように）
+                    target = int(ENRICH_CONVERTER_TARGET_SEC / max(self.item_sec, 1e-6))
+                    self.batch_size = max(ENRICH_CONVERTER_MIN_BATCH,
+                                          min(ENRICH_CONVERTER_MAX_BATCH, target, self.batch_size * 2))
+            else:
+                self.failures += 1
+                # 二分の途中の失敗は想定内のため、1 件だけのリクエストの（再送後の）失敗のみ数える
+                if size == 1 and not will_retry:
+                    self.consecutive_failures += 1
+                if ENRICH_ADAPTIVE_BATCH:
+                    # 失敗・タイムアウトした件数の半分から始め直す
+                    self.batch_size = max(ENRICH_CONVERTER_MIN_BATCH, min(self.batch_size, size // 2))
+            print(json.dumps({"converter_batch": self.name, "size": size, "ms": round(elapsed_sec * 1000, 1),
+                              "ok": error is None, "error": error, "next_size": self.batch_size}))
+            if self.consecutive_failures > ENRICH_CONVERTER_MAX_FAILURES:
+                raise RuntimeError(f"kana-converter failed {self.consecutive_failures} times in a row.")
+
+    def take(self, remaining):
+        with self._lock:
+            return min(self.batch_size, remaining)
+
+    def stats(self):
+        ordered = sorted(self.latencies_ms)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 1) if ordered else None
+
+        return {"batches": len(ordered), "failures": self.failures, "batch_size": self.batch_size,
+                "p50_ms": pct(50), "p95_ms": pct(95), "max_ms": round(ordered[-1], 1) if ordered else None,
+                "poison": len(self.poison_ids)}
+
+def _post(batch):
+    payload = {"items": batch}
+    if ENRICH_NGRAMS:
+        payload["representations"] = representations()
+    response = get_session().post(CONVERTER_URL, json=payload, timeout=ENRICH_CONVERTER_TIMEOUT_SEC)
+    response.raise_for_status()
+    results = response.json().get("results", [])
+    if len(results) != len(batch):
+        raise ValueError(f"Expected {len(batch)} results, got {len(results)}")
+    return results
+
+def _convert_inprocess(batch):
+    results, _ = get_inprocess_converter().convert_items(batch, representations=tuple(representations()))
+    return results
+
+def _convert_with_bisect(batch, batcher, convert=_post, retried=False):
+    """batch を convert（HTTP またはプロセス内）で変換する。失敗した場合は二分して再送し、
+    単独で 2 回続けて失敗したアイテムの結果は None にする"""
+    started = time.time()
+    try:
+        results = convert(batch)
+    except Exception as e:
+        will_retry = ENRICH_BISECT and len(batch) == 1 and not retried
+        batcher.record(len(batch), time.time() - started, error=str(e)[:200], will_retry=will_retry)
+        if not ENRICH_BISECT:
+            raise
+        if batcher.deadline is not None and time.time() > batcher.deadline:
+            raise RuntimeError("Time budget exhausted while retrying failed conversions.") from e
+        if len(batch) == 1:
+            # 一時的なエラーで poison row 扱いにしないよう、単独のリクエストは 1 回だけ再送する
+            if will_retry:
+                return _convert_with_bisect(batch, batcher, convert, retried=True)
+            print(f"Skipping item {batch[0].get('id')} from {batcher.name}: conversion failed on its own ({e})")
+            with batcher._lock:
+                batcher.poison_ids.add(batch[0].get("id"))
+            return [None]
+        mid = len(batch) // 2
+        return _convert_with_bisect(batch[:mid], batcher, convert) + _convert_with_bisect(batch[mid:], batcher, convert)
+    batcher.record(len(batch), time.time() - started)
+    return results
+
+def call_converter_http(items, batcher=None):
+    """items を batcher が決める件数ずつ、最大 ENRICH_CONVERTER_PARALLELISM 並列で変換する（結果は入力順）
+    変換できなかったアイテム（poison row）の結果は None。kana-converter の障害とみなした場合は例外を送出する
+    """
+    batcher = batcher or ConverterBatcher()
+    results = [None] * len(items)
+    next_start = [0]
+    position_lock = threading.Lock()
+    aborted = threading.Event()
+
+    def worker():
+        # 件数は取り出すたびに batcher に問い合わせ、直前の結果を次のリクエストに反映する
+        while not aborted.is_set():
+            with position_lock:
+                start = next_start[0]
+                if start >= len(items):
+                    return
+                size = batcher.take(len(items) - start)
+                next_start[0] = start + size
+            try:
+                results[start:start + size] = _convert_with_bisect(items[start:start + size], batcher)
+            except Exception:
+                # 他のワーカーも残りのリクエストを送らずに終了させる
+                aborted.set()
+                raise
+
+    workers = min(ENRICH_CONVERTER_PARALLELISM, -(-len(items) // max(1, batcher.batch_size)))
+    if workers <= 1:
+        worker()
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(worker) for _ in range(workers)]:
+                future.result()
+    return results
+
+def call_converter(items, batcher=None):
+    """items の文字列フィールドに *_kana（ENRICH_NGRAMS 時は *_ngrams も）を付与した結果を入力順に返す
+    変換できなかったアイテム（poison row）の結果は None になる（プロセス内変換も HTTP と同様に二分して切り分ける）
+    """
+    if ENRICH_CONVERTER_MODE == "inprocess":
+        converter = get_inprocess_converter()
+        if converter is not None:
+            try:
+                return _convert_with_bisect(items, batcher or ConverterBatcher(), _convert_inprocess)
+            except Exception as e:
+                if not CONVERTER_URL:
+                    raise
+                print(f"In-process conversion failed, falling back to HTTP: {e}")
+        elif not CONVERTER_URL:
+            raise RuntimeError("In-process converter unavailable and CONVERTER_URL is not set.")
+    return call_converter_http(items, batcher)
+
+def build_search_fields(converted_items, fields):
+    """変換結果に検索用テキスト（search_text）と n-gram 検索キー（search_ngrams）を付与する"""
+    for item in converted_items:
+        # すべての変換対象フィールドとそのカナを結合して、横断検索用インデックスを作成
+        search_parts = []
+        for k in fields:
+            val = item.get(k, "")
+            kana = item.get(f"{k}_kana", "")
+            if val: search_parts.append(str(val))
+            if kana: search_parts.append(str(kana))
+        item["search_text"] = " ".join(search_parts)
+
+        if ENRICH_NGRAMS:
+            # フィールドごとの n-gram を 1 つの検索キー列にまとめる（空白区切り）
+            ngrams = set()
+            for k in fields:
+                ngrams.update(item.pop(f"{k}_ngrams", []))
+            item["search_ngrams"] = " ".join(sorted(ngrams))
+    return converted_items
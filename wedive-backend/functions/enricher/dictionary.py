@@ -0,0 +1,139 @@
+"""
+テーブル横断の読み辞書（kana_dictionary テーブル）
+
+生物の family / category、ポイントの area などは語彙が小さく、同じ文字列がテーブル・実行をまたいで繰り返し現れる。
+エンリッチ時は先にこの辞書を引き、辞書にない文字列だけを kana-converter に送る。
+新しく得た読みは実行の最後にまとめて kana_dictionary に MERGE する。
+辞書を引くのは ENRICH_REGISTRY の dictionary_fields（語彙の小さいフィールド）のみで、name など値ごとに異なるフィールドは
+辞書に載せない（辞書は毎回全件を読み込むため、元テーブルと同じ速さで増えないようにする）。
+辞書のキーは正規化した原文で、読みも正規化した原文を変換したものを保存する（正規化後に同じになる表記は同じ読みになる）。
+"""
+import os
+import re
+import threading
+import unicodedata
+
+# kana_dictionary を先に引き、辞書にない文字列だけを変換する
+ENRICH_DICTIONARY = os.environ.get("ENRICH_DICTIONARY", "true").lower() == "true"
+DICTIONARY_TABLE = "kana_dictionary"
+
+SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """辞書のキー（NFKC・前後の空白除去・連続する空白を 1 つに）"""
+    return SPACES_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class KanaDictionary:
+    """kana_dictionary の内容をメモリに読み込み、テーブル間で共有する（スレッドセーフ）"""
+
+    def __init__(self, warehouse):
+        self.warehouse = warehouse
+        self._lock = threading.Lock()
+        rows, _ = warehouse.query_rows(
+            f"SELECT text, reading FROM {warehouse.table(DICTIONARY_TABLE)}", label=DICTIONARY_TABLE)
+        self.readings = {row["text"]: row["reading"] for row in rows}
+        self.loaded = len(self.readings)
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, items, fields, dictionary_fields):
+        """items を辞書で引く（辞書を引くのは dictionary_fields のみ。それ以外のフィールドは常に変換する）
+        (辞書で得た *_kana の dict をアイテムごとに並べたリスト, [(index, 変換が必要なフィールドのみのアイテム), ...]) を返す
+        変換が必要なアイテムの dictionary_fields の値は正規化した原文にする（learn でその読みをキーと対応させて保存する）
+        """
+        prefilled = []
+        pending = []
+        hits = misses = 0
+        with self._lock:
+            for index, item in enumerate(items):
+                known = {}
+                unknown = {}
+                for k in fields:
+                    v = item.get(k)
+                    if not isinstance(v, str) or not v.strip():
+                        continue
+                    if k not in dictionary_fields:
+                        unknown[k] = v
+                        continue
+                    text = normalize_text(v)
+                    reading = self.readings.get(text)
+                    if reading is None:
+                        unknown[k] = text
+                        misses += 1
+                    else:
+                        known[f"{k}_kana"] = reading
+                        hits += 1
+                prefilled.append(known)
+                if unknown:
+                    pending.append((index, {"id": item["id"], **unknown}))
+            self.hits += hits
+            self.misses += misses
+        return prefilled, pending
+
+    def learn(self, converted_items, dictionary_fields):
+        """lookup で送った（正規化済みの）文字列の読みを辞書に追加する（同じ実行内の以降のページ・他のテーブルでも使う）"""
+        with self._lock:
+            for item in converted_items:
+                for k in dictionary_fields:
+                    text = item.get(k)
+                    reading = item.get(f"{k}_kana")
+                    if isinstance(text, str) and text and reading and text not in self.readings:
+                        self.readings[text] = reading
+                        self.new_entries[text] = reading
+
+    def flush(self):
+        """新しい読みを一時テーブル経由で kana_dictionary にまとめて MERGE し、件数を返す"""
+        with self._lock:
+            rows = [{"text": text, "reading": reading} for text, reading in self.new_entries.items()]
+            self.new_entries = {}
+        if rows:
+            self.warehouse.load_rows(f"tmp_{DICTIONARY_TABLE}_new", rows, label=DICTIONARY_TABLE)
+            self.warehouse.merge(DICTIONARY_TABLE, f"tmp_{DICTIONARY_TABLE}_new", "text", ["reading"])
+        return len(rows)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries_loaded": self.loaded, "lookups": lookups, "hits": self.hits,
+                "reuse_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+    def for_fields(self, dictionary_fields):
+        """テーブルごとに辞書を引くフィールドを固定したビュー（dictionary_fields が空の場合は None）"""
+        return TableDictionary(self, dictionary_fields) if dictionary_fields else None
+
+
+class TableDictionary:
+    """KanaDictionary をテーブルの dictionary_fields に限定して引く"""
+
+    def __init__(self, dictionary, dictionary_fields):
+        self.dictionary = dictionary
+        self.dictionary_fields = list(dictionary_fields)
+
+    def lookup(self, items, fields):
+        return self.dictionary.lookup(items, fields, self.dictionary_fields)
+
+    def learn(self, converted_items):
+        self.dictionary.learn(converted_items, self.dictionary_fields)
+
+
+def disabled_reason(ngrams=False):
+    """辞書を使わない理由（Enrichment summary に出力する）"""
+    if not ENRICH_DICTIONARY:
+        return "ENRICH_DICTIONARY=false"
+    if ngrams:
+        return "ENRICH_NGRAMS=true (the dictionary holds readings only)"
+    return "kana_dictionary unavailable"
+
+
+def open_dictionary(warehouse, ngrams=False):
+    """辞書を読み込む。無効な場合・n-gram を生成する場合（辞書は読みのみ保持）・テーブルが無い場合は None"""
+    if not ENRICH_DICTIONARY or ngrams:
+        print(f"Kana dictionary disabled: {disabled_reason(ngrams)}")
+        return None
+    try:
+        return KanaDictionary(warehouse)
+    except Exception as e:
+        print(f"Kana dictionary unavailable, converting every string: {e}")
+        return None
@@ -1,105 +1,265 @@
 import os
-import requests
 import json
-from google.cloud import bigquery
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from conversion import CONVERTER_URL, ENRICH_CONVERTER_MODE, ENRICH_NGRAMS, ConverterBatcher, build_search_fields, call_converter
+from dictionary import disabled_reason, open_dictionary
+from changelog import ENRICH_RECONCILE, delete_removed, latest_timestamp, open_watermarks, source_rows_sql
+from registry import ENRICH_REGISTRY
+
+try:
+    from warehouse import get_warehouse
+except ImportError:
+    # ローカル実行時は functions/shared を参照する（デプロイ時は deploy.sh がコピーする）
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+    from warehouse import get_warehouse
 
 # 設定
 PROJECT_ID = os.environ.get("GCP_PROJECT")
 DATASET_ID = os.environ.get("BQ_DATASET", "wedive_master_data_v1")
-CONVERTER_URL = os.environ.get("CONVERTER_URL") # kana-converter のエンドポイント
-
-def run_enrichment_for_table(bq_client, source_table, enriched_table, fields=["name"]):
-    """特定のテーブルに対して増分エンリッチメントを実行する"""
-    print(f"Checking enrichment for {source_table}...")
+# 1 ページ（1 回の抽出・変換・MERGE）あたりの最大件数
+ENRICH_PAGE_SIZE = int(os.environ.get("ENRICH_PAGE_SIZE", "1000"))
+# 変更が無くなるまでページ単位で繰り返す（false の場合は 1 ページのみ）
+ENRICH_DRAIN = os.environ.get("ENRICH_DRAIN", "true").lower() == "true"
+# 1 回の起動でエンリッチに使う時間の上限（秒）。関数のタイムアウトより短くする
+ENRICH_TIME_BUDGET_SEC = float(os.environ.get("ENRICH_TIME_BUDGET_SEC", "240"))
+# 変更検出を元フィールドのフィンガープリント（source_fingerprint 列）の比較で行う
+ENRICH_FINGERPRINT = os.environ.get("ENRICH_FINGERPRINT", "true").lower() == "true"
+# 同時にエンリッチするテーブル数
+ENRICH_TABLE_PARALLELISM = int(os.environ.get("ENRICH_TABLE_PARALLELISM", "2"))
 
-    # 1. 変換が必要なレコードを抽出（新規 または 前回エンリッチ時から名前等が変わったもの）
+def changed_rows_query(warehouse, source_table, enriched_table, fields, fingerprint=None, window=None):
+    """変換が必要なレコード（新規 または 前回エンリッチ時から元フィールドが変わったもの）を抽出する SQL
+    fingerprint=True の場合は元フィールドの FARM_FINGERPRINT を比較する。
+    エンリッチ済みテーブル側は id と source_fingerprint のみを読むためスキャン量が減り、NULL の変化も検出できる。
+    window=(since, until) の場合は、その期間に changelog に書き込まれたドキュメントのみを対象にする。
+    ENRICH_NGRAMS 有効時は search_ngrams 未作成の行も対象にする（有効化前にエンリッチ済みの行を補完する）。
+    """
+    if fingerprint is None:
+        fingerprint = ENRICH_FINGERPRINT
     field_select = ", ".join([f"JSON_VALUE(s.data, '$.{f}') as {f}" for f in fields])
-    change_conditions = " OR ".join([f"t.{f} != JSON_VALUE(s.data, '$.{f}')" for f in fields])
+    source = source_rows_sql(warehouse, source_table, window)
+    backfill = " OR t.search_ngrams IS NULL" if ENRICH_NGRAMS else ""
 
-    query = f"""
+    if not fingerprint:
+        change_conditions = " OR ".join([f"t.{f} != JSON_VALUE(s.data, '$.{f}')" for f in fields])
+        return f"""
         SELECT s.document_id AS id, {field_select}
-        FROM `{PROJECT_ID}.{DATASET_ID}.{source_table}` s
-        LEFT JOIN `{PROJECT_ID}.{DATASET_ID}.{enriched_table}` t ON s.document_id = t.id
-        WHERE t.id IS NULL OR {change_conditions}
-        LIMIT 1000
+        FROM ({source}) s
+        LEFT JOIN {warehouse.table(enriched_table)} t ON s.document_id = t.id
+        WHERE t.id IS NULL OR {change_conditions}{backfill}
+        LIMIT {ENRICH_PAGE_SIZE}
+    """
+
+    # JSON は CTE で 1 フィールド 1 回だけ展開し、STRUCT の JSON 表現（NULL と空文字を区別する）をハッシュする
+    # エンリッチ済みテーブルにも同名の列があるため、フィールドは s. で修飾する
+    source_fields = ", ".join(f"s.{f}" for f in fields)
+    return f"""
+        WITH s AS (
+            SELECT s.document_id AS id, {field_select}
+            FROM ({source}) s
+        )
+        SELECT s.*, FARM_FINGERPRINT(TO_JSON_STRING(STRUCT({source_fields}))) AS source_fingerprint
+        FROM s
+        LEFT JOIN {warehouse.table(enriched_table)} t ON s.id = t.id
+        WHERE t.id IS NULL
+           OR t.source_fingerprint IS DISTINCT FROM FARM_FINGERPRINT(TO_JSON_STRING(STRUCT({source_fields}))){backfill}
+        LIMIT {ENRICH_PAGE_SIZE}
+    """
+
+def enrich_table(warehouse, entry, deadline, dictionary, watermarks, reconcile):
+    """ENRICH_REGISTRY の 1 件をエンリッチする
+    watermark があれば changelog の差分を、無い場合（と reconcile 時）は全件を対象にする。
+    全件を処理し終えた場合のみ watermark を開始時点の changelog の最新の timestamp に進める
+    """
+    source_table, enriched_table, fields = entry["source"], entry["target"], entry["fields"]
+    # change_key が None のテーブルは ENRICH_FINGERPRINT に関わらずフィールドの値を比較する
+    fingerprint = None if entry["change_key"] == "source_fingerprint" else False
+    # 読み辞書は語彙の小さいフィールド（dictionary_fields）のみ引く
+    if dictionary is not None:
+        dictionary = dictionary.for_fields(entry.get("dictionary_fields"))
+    if watermarks is None:
+        return run_enrichment_for_table(
+            warehouse, source_table, enriched_table, fields, deadline, dictionary, fingerprint=fingerprint)
+
+    until = latest_timestamp(warehouse, source_table)
+    window = None if reconcile or until is None else watermarks.window(source_table, until)
+    deleted = delete_removed(warehouse, source_table, enriched_table, window)
+    summary = run_enrichment_for_table(
+        warehouse, source_table, enriched_table, fields, deadline, dictionary, window, fingerprint)
+    summary["mode"] = "incremental" if window else "full"
+    summary["deleted"] = deleted
+    # poison row があった場合は watermark を進めない（次回も同じ changelog の範囲を読み、再変換する）
+    if summary["drained"] and until is not None and not summary.get("converter", {}).get("poison"):
+        watermarks.set(source_table, until)
+    return summary
+
+def run_enrichment_for_table(warehouse, source_table, enriched_table, fields=["name"], deadline=None, dictionary=None,
+                             window=None, fingerprint=None):
+    """特定のテーブルに対して増分エンリッチメントを実行する
+    変更のあるレコードを ENRICH_PAGE_SIZE 件ずつ抽出・変換・MERGE し、変更が無くなるか deadline に達するまで繰り返す。
+    MERGE はページごとに完了するため、途中でタイムアウトしても完了済みのページは失われない（次回は残りから再開する）。
+    """
+    print(f"Checking enrichment for {source_table}...")
+    summary = {"pages": 0, "rows": 0, "drained": False, "elapsed_sec": 0.0}
+    # 変換リクエストの件数・レイテンシはページをまたいで引き継ぐ
+    batcher = ConverterBatcher(source_table, deadline)
+    started = time.time()
+    last_page_sec = 0.0
+    previous_ids = None
+
+    while True:
+        # 次のページが時間内に終わらない見込みなら、残りは次回の起動に回す
+        if deadline is not None and time.time() + last_page_sec > deadline:
+            print(f"Time budget exhausted for {source_table}; remaining rows will be enriched on the next run.")
+            break
+
+        page_started = time.time()
+        page_ids = enrich_page(warehouse, source_table, enriched_table, fields, batcher, dictionary, window, fingerprint)
+        last_page_sec = time.time() - page_started
+        if page_ids is None:
+            # 変換 API のエラー。同じページを繰り返さないよう中断する
+            break
+        if not page_ids:
+            summary["drained"] = True
+            break
+        if set(page_ids) == previous_ids:
+            # MERGE 後も同じレコードが抽出される場合（元データの id 重複など）は無限ループを避けて中断する
+            print(f"Same {len(page_ids)} records selected again for {source_table}; stopping.")
+            break
+
+        previous_ids = set(page_ids)
+        summary["pages"] += 1
+        summary["rows"] += len(page_ids)
+        print(f"Checkpoint: {source_table} page {summary['pages']} ({summary['rows']} rows so far, {last_page_sec:.1f}s)")
+        if len(page_ids) < ENRICH_PAGE_SIZE:
+            # 最終ページ（空のページを確認するためのクエリを省略する）
+            summary["drained"] = True
+            break
+        if not ENRICH_DRAIN:
+            break
+
+    summary["elapsed_sec"] = round(time.time() - started, 1)
+    if batcher.latencies_ms:
+        summary["converter"] = batcher.stats()
+    return summary
+
+def enrich_page(warehouse, source_table, enriched_table, fields, batcher=None, dictionary=None, window=None,
+                fingerprint=None):
+    """変更のあるレコードを 1 ページ分変換して MERGE する
+    抽出したレコードの id 一覧を返す（変更なしは空リスト、変換 API のエラー時は None）
+    dictionary（kana_dictionary）がある場合は先に引き、辞書にない文字列だけを変換する
+    単独でも変換に失敗したレコード（poison row）は MERGE せず、変更ありのまま残して次のページ・次回の実行で再変換する
     """
-    df = bq_client.query(query).to_dataframe()
+    # 1. 変換が必要なレコードを抽出（新規 または 前回エンリッチ時から名前等が変わったもの）
+    items, bytes_processed = warehouse.query_rows(
+        changed_rows_query(warehouse, source_table, enriched_table, fields, fingerprint, window), label=source_table)
+    if bytes_processed is not None:
+        print(f"Changed-row query for {source_table} processed {bytes_processed} bytes.")
 
-    if df.empty:
+    if not items:
         print(f"No changes detected for {source_table}.")
-        return
+        return []
 
-    # 2. kana-converter API を呼び出し (一括 JSON)
-    items = df.to_dict(orient="records")
-    print(f"Requesting conversion for {len(items)} items from {source_table}...")
+    # 2. 読み辞書を引き、辞書にない文字列だけ kana-converter を呼び出し（HTTP または プロセス内）
+    if dictionary is not None:
+        prefilled, pending = dictionary.lookup(items, fields)
+    else:
+        prefilled, pending = [{} for _ in items], list(enumerate(items))
+    print(f"Requesting conversion for {len(pending)} of {len(items)} items from {source_table} ({ENRICH_CONVERTER_MODE})...")
 
     try:
-        response = requests.post(CONVERTER_URL, json={"items": items}, timeout=60)
-        response.raise_for_status()
-        converted_items = response.json().get("results", [])
+        results = call_converter([item for _, item in pending], batcher) if pending else []
     except Exception as e:
         print(f"Error calling converter: {e}")
-        return
-
-    # 3. 検索用テキスト（search_text）の構築
-    for item in converted_items:
-        # すべての変換対象フィールドとそのカナを結合して、横断検索用インデックスを作成
-        search_parts = []
-        for k in fields:
-            val = item.get(k, "")
-            kana = item.get(f"{k}_kana", "")
-            if val: search_parts.append(str(val))
-            if kana: search_parts.append(str(kana))
-        item["search_text"] = " ".join(search_parts)
-
-    # 4. 結果を BigQuery に反映（一時テーブル経由で MERGE）
-    job_config = bigquery.LoadJobConfig(write_disposition="WRITE_TRUNCATE")
-    temp_table_id = f"{PROJECT_ID}.{DATASET_ID}.tmp_{source_table}_results"
-    bq_client.load_table_from_json(converted_items, temp_table_id, job_config=job_config).result()
-
-    # スキーマに応じた MERGE SQL
-    # すべての変換済みフィールドとそのカナを保存
-    set_clauses = []
-    insert_fields = ["id", "updated_at"]
-    insert_values = ["s.id", "CURRENT_TIMESTAMP()"]
+        return None
 
-    for k in fields:
-        set_clauses.append(f"t.{k} = s.{k}")
-        set_clauses.append(f"t.{k}_kana = s.{k}_kana")
-        insert_fields.extend([k, f"{k}_kana"])
-        insert_values.extend([f"s.{k}", f"s.{k}_kana"])
-
-    if "search_text" in converted_items[0]:
-        set_clauses.append("t.search_text = s.search_text")
-        insert_fields.append("search_text")
-        insert_values.append("s.search_text")
-
-    merge_query = f"""
-    MERGE `{PROJECT_ID}.{DATASET_ID}.{enriched_table}` t
-    USING `{temp_table_id}` s
-    ON t.id = s.id
-    WHEN MATCHED THEN
-      UPDATE SET {", ".join(set_clauses)}, updated_at = CURRENT_TIMESTAMP()
-    WHEN NOT MATCHED THEN
-      INSERT ({", ".join(insert_fields)}) VALUES ({", ".join(insert_values)})
-    """
+    converted_items = [{**item, **known} for item, known in zip(items, prefilled)]
+    poison_indexes = set()
+    for (index, item), result in zip(pending, results):
+        if result is None:
+            poison_indexes.add(index)
+        else:
+            # 元フィールドの値は抽出したものを残す（辞書を引いたフィールドは正規化した原文を送っているため）
+            converted_items[index].update({k: v for k, v in result.items() if k not in item})
+    if poison_indexes:
+        poison_ids = [items[index]["id"] for index in sorted(poison_indexes)]
+        print(f"Leaving {len(poison_ids)} records from {source_table} for retry (conversion failed): {poison_ids}")
+        converted_items = [item for index, item in enumerate(converted_items) if index not in poison_indexes]
+    if dictionary is not None:
+        dictionary.learn([result for result in results if result is not None])
+    if not converted_items:
+        return [item["id"] for item in items]
+
+    # 3. 検索用テキスト（search_text / search_ngrams）の構築
+    build_search_fields(converted_items, fields)
 
-    bq_client.query(merge_query).result()
+    # 4. 結果をウェアハウスに反映（一時テーブル経由で MERGE）
+    temp_table = f"tmp_{source_table}_results"
+    warehouse.load_rows(temp_table, converted_items, label=source_table)
+
+    # すべての変換済みフィールドとそのカナ、検索用の列を保存
+    columns = []
+    for k in fields:
+        columns.extend([k, f"{k}_kana"])
+    columns.extend(c for c in ("search_text", "source_fingerprint", "search_ngrams") if c in converted_items[0])
+    warehouse.merge(enriched_table, temp_table, "id", columns, label=source_table)
     print(f"Successfully enriched {len(converted_items)} records in {enriched_table}.")
+    return [item["id"] for item in items]
 
 def main(request):
-    """Cloud Run Functions エントリポイント (HTTPトリガー)"""
-    bq_client = bigquery.Client()
-    if not CONVERTER_URL:
+    """Cloud Run Functions エントリポイント (HTTPトリガー)
+    ?mode=reconcile を付けると、watermark に関わらず全件を再照合する
+    レスポンスは Enrichment summary（テーブルごとの結果・読み辞書・ウェアハウスの処理バイト数等）の JSON。
+    いずれかのテーブルが失敗した場合は 500 を返す
+    """
+    warehouse = get_warehouse(PROJECT_ID, DATASET_ID)
+    reconcile = ENRICH_RECONCILE or (request is not None and request.args.get("mode") == "reconcile")
+    if not CONVERTER_URL and ENRICH_CONVERTER_MODE != "inprocess":
         print("Error: CONVERTER_URL environment variable is not set.")
-        return
+        return ({"error": "CONVERTER_URL environment variable is not set."}, 500)
+
+    # 時間の上限は起動全体で共有する（使い切った場合、残りのテーブル・ページは次回に回る）
+    started = time.time()
+    deadline = started + ENRICH_TIME_BUDGET_SEC
 
-    # ポイント: 名前とエリア名
-    run_enrichment_for_table(bq_client, "points_raw_latest", "points_enriched", ["name", "area"])
+    # 読み辞書はテーブル間で共有し、新しい読みは最後にまとめて書き戻す
+    dictionary = open_dictionary(warehouse, ngrams=ENRICH_NGRAMS)
+    # watermark も最後にまとめて書き込む（処理し終えたテーブルのみ進める）
+    watermarks = open_watermarks(warehouse)
 
-    # 生物: 全属性
-    run_enrichment_for_table(bq_client, "creatures_raw_latest", "creatures_enriched",
-                             ["name", "scientificName", "englishName", "family", "category"])
+    # 登録されたテーブルごとに別スレッドで実行する（ウェアハウス・HTTP セッション・読み辞書は共有）
+    # 失敗したテーブルはサマリーに error を記録し、他のテーブルの結果（読み辞書・watermark）は書き込む
+    summaries = {}
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, ENRICH_TABLE_PARALLELISM)) as executor:
+            futures = {
+                entry["name"]: executor.submit(enrich_table, warehouse, entry, deadline, dictionary, watermarks, reconcile)
+                for entry in ENRICH_REGISTRY
+            }
+            for name, future in futures.items():
+                try:
+                    summaries[name] = future.result()
+                except Exception as e:
+                    print(f"Error enriching {name}: {e}")
+                    summaries[name] = {"error": str(e)}
+                    failed.append(name)
+    finally:
+        if dictionary is not None:
+            summaries["dictionary"] = {**dictionary.stats(), "entries_written": dictionary.flush()}
+        else:
+            summaries["dictionary"] = {"disabled": disabled_reason(ENRICH_NGRAMS)}
+        if watermarks is not None:
+            summaries["watermarks_advanced"] = watermarks.flush()
+    # 元テーブルごとのクエリ・ロード・MERGE の処理バイト数・課金バイト数・スロット時間・所要時間
+    summaries["warehouse"] = warehouse.stats.summary()
 
-    return "OK"
+    summaries["total_elapsed_sec"] = round(time.time() - started, 1)
+    print(f"Enrichment summary: {json.dumps(summaries)}")
+    if failed:
+        summaries["failed"] = failed
+        return (summaries, 500)
+    return (summaries, 200)
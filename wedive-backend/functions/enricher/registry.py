@@ -0,0 +1,35 @@
+"""
+エンリッチ対象テーブルの登録
+
+テーブルを追加する場合は ENRICH_REGISTRY に 1 件追加し、bigquery/tables に
+エンリッチ済みテーブル（id・fields とその *_kana・search_text・search_ngrams・source_fingerprint・updated_at）を作成する。
+登録したテーブルは同じ処理（変更検出・読み辞書・kana-converter へのバッチ送信・MERGE）でエンリッチされる。
+
+各項目:
+    name        Enrichment summary に出力する名前
+    source      元テーブル（Firestore → BigQuery 拡張機能の *_raw_latest。差分は対応する *_raw_changelog から読む）
+    target      エンリッチ済みテーブル
+    fields      カナに変換するフィールド（data の JSON のキー）
+    change_key  変更検出に使うエンリッチ済みテーブルの列。source_fingerprint は fields のフィンガープリントを比較し
+                （ENRICH_FINGERPRINT=false の場合を除く）、None は fields の値を直接比較する
+    dictionary_fields
+                読み辞書（kana_dictionary）を引くフィールド。語彙の小さいものに限る（name など値ごとに異なるフィールドは
+                辞書を元テーブルと同じ速さで大きくするため載せない）。空の場合は辞書を使わない
+"""
+
+ENRICH_REGISTRY = [
+    # ポイント: 名前とエリア名
+    {"name": "points", "source": "points_raw_latest", "target": "points_enriched",
+     "fields": ["name", "area"], "change_key": "source_fingerprint", "dictionary_fields": ["area"]},
+    # 生物: 全属性
+    {"name": "creatures", "source": "creatures_raw_latest", "target": "creatures_enriched",
+     "fields": ["name", "scientificName", "englishName", "family", "category"], "change_key": "source_fingerprint",
+     "dictionary_fields": ["family", "category"]},
+    # 地理階層: 名前（v_app_geography_master が結合する）。エリア名はポイントの area と同じ語彙のため辞書を引く
+    {"name": "areas", "source": "areas_raw_latest", "target": "areas_enriched",
+     "fields": ["name"], "change_key": "source_fingerprint", "dictionary_fields": ["name"]},
+    {"name": "zones", "source": "zones_raw_latest", "target": "zones_enriched",
+     "fields": ["name"], "change_key": "source_fingerprint", "dictionary_fields": []},
+    {"name": "regions", "source": "regions_raw_latest", "target": "regions_enriched",
+     "fields": ["name"], "change_key": "source_fingerprint", "dictionary_fields": []},
+]
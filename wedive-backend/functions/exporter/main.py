@@ -4,15 +4,27 @@ import sqlite3
 import gzip
 import shutil
 import tempfile
-from datetime import datetime
-from google.cloud import bigquery
-from google.cloud import storage
-import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    from warehouse import get_warehouse
+except ImportError:
+    # ローカル実行時は functions/shared を参照する（デプロイ時は deploy.sh がコピーする）
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+    from warehouse import get_warehouse
 
 # 設定（環境変数またはデフォルト値）
 PROJECT_ID = os.environ.get("GCP_PROJECT")
 DATASET_ID = os.environ.get("BQ_DATASET", "wedive_master_data_v1")
 BUCKET_NAME = os.environ.get("GCS_BUCKET", "wedive-app-static-master")
+# 指定した場合は GCS にアップロードせず、このディレクトリに同じパスで保存する（ローカル実行・ベンチマーク用）
+EXPORT_LOCAL_DIR = os.environ.get("EXPORT_LOCAL_DIR")
+# 同時に実行するビューのクエリ数（SQLite / JSON への書き込みはビューの順に 1 つずつ行う）
+EXPORT_PARALLELISM = int(os.environ.get("EXPORT_PARALLELISM", "4"))
 
 # BigQuery View -> SQLite Table マッピング
 TABLE_MAPPING = {
@@ -27,10 +39,79 @@ TABLE_MAPPING = {
     "v_app_agencies_master": "master_agencies",
 }
 
+# Arrow の型 -> SQLite の型（pandas の to_sql と同じ対応）
+def sqlite_type(arrow_type):
+    import pyarrow.types as pat
+
+    if pat.is_integer(arrow_type) or pat.is_boolean(arrow_type):
+        return "INTEGER"
+    if pat.is_floating(arrow_type) or pat.is_decimal(arrow_type):
+        return "REAL"
+    if pat.is_timestamp(arrow_type):
+        return "TIMESTAMP"
+    return "TEXT"
+
+def sqlite_value(value):
+    # 日時は pandas の to_sql と同じ ISO 形式（区切りは空白）の文字列にする
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def json_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def write_view(conn, table_name, table):
+    """Arrow の Table を SQLite のテーブルへ書き込み（既存のテーブルは置き換える）、JSON 用のレコード（dict）一覧を返す
+    Python の値への変換（to_pylist）はレコードバッチの列ごとに 1 回だけ行い、SQLite と JSON の両方に使う
+    （JSON は NULL を null、日時を UTC の ISO 形式にする）
+    """
+    columns = ", ".join(f'"{field.name}" {sqlite_type(field.type)}' for field in table.schema)
+    conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    conn.execute(f'CREATE TABLE "{table_name}" ({columns})')
+    placeholders = ", ".join("?" for _ in table.schema)
+    records = []
+    for batch in table.to_batches():
+        values = [column.to_pylist() for column in batch.columns]
+        conn.executemany(f'INSERT INTO "{table_name}" VALUES ({placeholders})',
+                         zip(*[[sqlite_value(v) for v in column] for column in values]))
+        json_columns = [[json_value(v) for v in column] for column in values]
+        records.extend(dict(zip(table.column_names, row)) for row in zip(*json_columns))
+    conn.commit()
+    return records
+
+def fetch_view(warehouse, view_name):
+    """ビューの全件を Arrow の Table で取得し、(Table, 所要時間 ms) を返す（ワーカースレッドで実行）"""
+    started = time.time()
+    table = warehouse.query_arrow(f"SELECT * FROM {warehouse.table(view_name)}", label=view_name)
+    return table, round((time.time() - started) * 1000, 1)
+
 def compress_and_upload(local_file_path, destination_blob_name):
     """ファイルを gzip 圧縮して GCS にアップロードする。
     Content-Encoding を設定しないことで、ダウンロード時の勝手な解凍を防止する。
+    EXPORT_LOCAL_DIR が指定されている場合はローカルに保存する。
     """
+    if EXPORT_LOCAL_DIR:
+        gz_path = os.path.join(EXPORT_LOCAL_DIR, destination_blob_name)
+        os.makedirs(os.path.dirname(gz_path), exist_ok=True)
+        with open(local_file_path, 'rb') as f_in:
+            with gzip.open(gz_path, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        print(f"Saved and compressed: {gz_path}")
+        return
+
+    from google.cloud import storage
     client = storage.Client()
     bucket = client.bucket(BUCKET_NAME)
     blob = bucket.blob(destination_blob_name)
@@ -57,25 +138,25 @@ def main(request):
     """
     Cloud Run Functions エントリポイント (HTTPトリガー)
     """
-    bq_client = bigquery.Client()
+    warehouse = get_warehouse(PROJECT_ID, DATASET_ID)
+    started = time.time()
 
     with tempfile.TemporaryDirectory() as tmp_dir:
         sqlite_path = os.path.join(tmp_dir, "master.db")
         json_data = {}
+        views = {}
 
-        # SQLite 作成
+        # ビューのクエリは並列に実行し、書き込みは TABLE_MAPPING の順に行う（書き込み中も後続のビューのクエリは進む）
         conn = sqlite3.connect(sqlite_path)
-        for view_name, table_name in TABLE_MAPPING.items():
-            print(f"Processing {view_name} -> {table_name}...")
-            query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.{view_name}`"
-            df = bq_client.query(query).to_dataframe()
-            df.to_sql(table_name, conn, if_exists="replace", index=False)
-
-            # JSON用データ加工
-            df_json = df.copy()
-            for col in df_json.select_dtypes(include=['datetime64', 'datetimetz']).columns:
-                df_json[col] = df_json[col].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            json_data[table_name] = df_json.to_dict(orient="records")
+        with ThreadPoolExecutor(max_workers=max(1, EXPORT_PARALLELISM)) as executor:
+            futures = {view_name: executor.submit(fetch_view, warehouse, view_name) for view_name in TABLE_MAPPING}
+            for view_name, table_name in TABLE_MAPPING.items():
+                table, query_ms = futures[view_name].result()
+                print(f"Processing {view_name} -> {table_name}...")
+                write_started = time.time()
+                json_data[table_name] = write_view(conn, table_name, table)
+                views[view_name] = {"rows": table.num_rows, "query_ms": query_ms,
+                                    "write_ms": round((time.time() - write_started) * 1000, 1)}
         conn.close()
 
         # 1. SQLite アップロード
@@ -89,5 +170,9 @@ def main(request):
             json.dump(json_data, f, ensure_ascii=False)
         compress_and_upload(json_path, "v1/master/latest.json.gz")
 
+    # ビューごとの件数・クエリ（取得を含む）と書き込みの所要時間、処理バイト数・課金バイト数・スロット時間
+    summary = {"views": views, "warehouse": warehouse.stats.summary(),
+               "total_elapsed_sec": round(time.time() - started, 1)}
+    print(f"Export summary: {json.dumps(summary)}")
     print("Export process completed successfully.")
     return "OK"
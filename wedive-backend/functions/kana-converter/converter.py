@@ -0,0 +1,578 @@
+"""
+kana-converter の変換ロジック（HTTP に依存しない部分）
+
+文字列のカタカナ読み（Sudachi）と、そこから導出する表現（ひらがな・ローマ字・NFKC・n-gram）を求める。
+HTTP エンドポイント（main.py）のほか、エンリッチャーからプロセス内で直接呼び出すこともできる。
+"""
+import math
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from lexicon import DomainLexicon
+from sudachipy import dictionary
+from sudachipy import tokenizer
+
+# Sudachi の初期化は初回利用時まで遅延させる（OPTIONS 等は辞書ロードを待たずに応答できる）
+# 一度ロードした辞書はグローバルに保持し、ウォームスタート時に再利用する
+# トークナイザは並行利用できないため、辞書を共有したままスレッドごとに作成する
+dictionary_obj = None
+_tokenizer_local = threading.local()
+mode = tokenizer.Tokenizer.SplitMode.C
+dictionary_load_ms = None
+_tokenizer_lock = threading.Lock()
+
+# 変換結果キャッシュの上限件数（0 でキャッシュ無効）
+KANA_CACHE_SIZE = int(os.environ.get("KANA_CACHE_SIZE", "10000"))
+# デプロイ時に同梱する読みキャッシュ（SQLite、読み取り専用）。ファイルが無ければ使用しない
+KANA_READINGS_DB = os.environ.get(
+    "KANA_READINGS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "readings.db"))
+# リクエスト内で同じ文字列を 1 回だけ変換する（重複排除）
+KANA_DEDUPE = os.environ.get("KANA_DEDUPE", "true").lower() == "true"
+# 形態素解析が不要な単語（カタカナのみ・ひらがなのみ）は Sudachi を通さずに変換する
+KANA_FASTPATH = os.environ.get("KANA_FASTPATH", "true").lower() == "true"
+# ドメイン辞書（生物名・科名・エリア名）の最長一致を Sudachi より優先する
+KANA_LEXICON = os.environ.get("KANA_LEXICON", "true").lower() == "true"
+KANA_LEXICON_PATH = os.environ.get(
+    "KANA_LEXICON_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon.tsv"))
+# 並列変換のワーカープロセス数（"0" で逐次処理、"auto" で利用可能な CPU 数）
+KANA_WORKERS = os.environ.get("KANA_WORKERS", "0")
+# この件数未満のバッチはプロセス間通信のコストの方が大きいため逐次処理する
+KANA_PARALLEL_MIN_ITEMS = int(os.environ.get("KANA_PARALLEL_MIN_ITEMS", "200"))
+# 1 チャンクあたりの最大件数（チャンク分割はワーカーへ分散する場合のみ。KANA_WORKERS=0 の逐次処理では使わない）
+KANA_PARALLEL_CHUNK_SIZE = int(os.environ.get("KANA_PARALLEL_CHUNK_SIZE", "250"))
+# 1 チャンクあたりの最大文字数（長い文字列が 1 つのワーカーに偏らないよう、件数と文字数の両方で区切る）
+KANA_PARALLEL_CHUNK_CHARS = int(os.environ.get("KANA_PARALLEL_CHUNK_CHARS", "20000"))
+
+# 英数字（全角含む）、漢字、ひらがな、カタカナの塊を単語として認識し、それ以外（記号・空白）を区切りとして保持
+# () で囲むことで、分割後のリストに区切り文字も含まれる
+# 呼び出しごとにパターンを組み立て直さないよう、モジュール読み込み時にコンパイルしておく
+word_pattern = r'[a-zA-Z0-9\uFF10-\uFF19\uFF21-\uFF3A\uFF41-\uFF5A\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]'
+SPLIT_RE = re.compile(f'({word_pattern}+)')
+WORD_RE = re.compile(f'^{word_pattern}+$')
+# 読みが表記そのもの（カタカナ）またはその単純な置き換え（ひらがな）になる単語
+# 英字・数字は Sudachi がカナ読み（Manta -> マンタ）や小文字化を行うため対象外
+KATAKANA_WORD_RE = re.compile(r'^[ァ-ヺー]+$')
+HIRAGANA_WORD_RE = re.compile(r'^[ぁ-ゖー]+$')
+
+# 単語をどの経路で変換したかの件数（lexicon: ドメイン辞書、fastpath: Sudachi を省略、sudachi: 形態素解析）
+span_stats = {"lexicon": 0, "fastpath": 0, "sudachi": 0}
+
+
+class KanaCache:
+    """件数上限付きの LRU キャッシュ（ヒット・ミス・追い出し件数を集計する）"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 複数スレッドのリクエストから同時に更新されるため、順序の入れ替えと追い出しはロック内で行う
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# インスタンス単位で共有（ウォームスタート時は前回リクエストの結果を再利用）
+kana_cache = KanaCache(KANA_CACHE_SIZE)
+
+
+class ReadingStore:
+    """永続化された読みキャッシュ（text -> reading）の読み取り専用ビュー
+    コールドスタート時でも過去のエンリッチ結果を Sudachi を通さずに返すために使う。
+    初回参照時に遅延オープンし、接続はスレッドごとに保持する。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.enabled = bool(path) and os.path.exists(path)
+        self.entries = None
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True)
+            self._local.conn = conn
+            if self.entries is None:
+                self.entries = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+                print(f"Loaded reading cache: {self.path} ({self.entries} entries)")
+        return conn
+
+    def open(self):
+        if self.enabled:
+            self._connect()
+
+    def get(self, text):
+        if not self.enabled:
+            return None
+        try:
+            row = self._connect().execute("SELECT reading FROM readings WHERE text = ?", (text,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Reading cache disabled: {e}")
+            self.enabled = False
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "entries": self.entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+reading_store = ReadingStore(KANA_READINGS_DB)
+
+
+def get_tokenizer():
+    """呼び出し元スレッドの Sudachi トークナイザを返す（辞書のロードはプロセスで初回のみ行い、所要時間を記録する）"""
+    global dictionary_obj, dictionary_load_ms
+    if dictionary_obj is None:
+        with _tokenizer_lock:
+            if dictionary_obj is None:
+                started = time.perf_counter()
+                dictionary_obj = dictionary.Dictionary()
+                dictionary_load_ms = round((time.perf_counter() - started) * 1000, 1)
+                print(f"Loaded Sudachi dictionary in {dictionary_load_ms} ms")
+    tokenizer_obj = getattr(_tokenizer_local, "tokenizer", None)
+    if tokenizer_obj is None:
+        tokenizer_obj = _tokenizer_local.tokenizer = dictionary_obj.create()
+    return tokenizer_obj
+
+
+domain_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def preload():
+    """Sudachi 辞書・ドメイン辞書・読みキャッシュを事前にロードする（ウォームアップ・ワーカー起動時用）"""
+    get_tokenizer()
+    get_lexicon()
+    reading_store.open()
+
+
+def get_lexicon():
+    """ドメイン辞書を返す（無効時・ファイルが無い場合は None）"""
+    global domain_lexicon, KANA_LEXICON
+    if KANA_LEXICON and domain_lexicon is None:
+        with _lexicon_lock:
+            if domain_lexicon is None:
+                if not os.path.exists(KANA_LEXICON_PATH):
+                    print(f"Domain lexicon not found: {KANA_LEXICON_PATH}")
+                    KANA_LEXICON = False
+                    return None
+                domain_lexicon = DomainLexicon.load(KANA_LEXICON_PATH)
+                print(f"Loaded domain lexicon: {KANA_LEXICON_PATH} ({len(domain_lexicon)} terms)")
+    return domain_lexicon if KANA_LEXICON else None
+
+
+def _tokenize_to_kana(text):
+    """キャッシュを介さずに読みを求める（ドメイン辞書の一致部分以外を Sudachi で解析）"""
+    lexicon = get_lexicon()
+    if lexicon is None:
+        return _tokenize_spans(text)
+
+    kana_parts = []
+    for segment, reading in lexicon.segments(text):
+        if reading is not None:
+            span_stats["lexicon"] += 1
+            kana_parts.append(reading)
+        else:
+            kana_parts.append(_tokenize_spans(segment))
+    return "".join(kana_parts)
+
+
+def _tokenize_spans(text):
+    """単語（英数字・かな・漢字の塊）ごとに読みを求め、記号・空白はそのまま残す"""
+    parts = SPLIT_RE.split(text)
+
+    kana_parts = []
+    for part in parts:
+        if not part:
+            continue
+
+        if KANA_FASTPATH and KATAKANA_WORD_RE.match(part):
+            span_stats["fastpath"] += 1
+            kana_parts.append(part)
+        elif KANA_FASTPATH and HIRAGANA_WORD_RE.match(part):
+            span_stats["fastpath"] += 1
+            kana_parts.append(part.translate(KATAKANA_TABLE))
+        # 単語の部分（正規表現にマッチするもの）のみ Sudachi で解析
+        elif WORD_RE.match(part):
+            span_stats["sudachi"] += 1
+            tokens = get_tokenizer().tokenize(part, mode)
+            for m in tokens:
+                reading = m.reading_form()
+                # 読みがあれば採用、ただし万が一「キゴウ」系が出たら表面文字を採用
+                if reading and "キゴウ" not in reading:
+                    kana_parts.append(reading)
+                else:
+                    kana_parts.append(m.surface())
+        else:
+            # 記号や空白の塊はそのまま通す
+            kana_parts.append(part)
+
+    return "".join(kana_parts)
+
+
+def to_kana(text):
+    if not text:
+        return ""
+
+    cached = kana_cache.get(text)
+    if cached is not None:
+        return cached
+
+    kana = reading_store.get(text)
+    if kana is None:
+        kana = _tokenize_to_kana(text)
+    kana_cache.put(text, kana)
+    return kana
+
+
+def _cached_kana(text):
+    """変換結果キャッシュ・読みキャッシュ（readings.db）だけを引く（無ければ None）"""
+    if not text:
+        return ""
+    kana = kana_cache.get(text)
+    if kana is None:
+        kana = reading_store.get(text)
+        if kana is not None:
+            kana_cache.put(text, kana)
+    return kana
+
+
+# 出力可能な表現（kana はカタカナ読み。hiragana / romaji は読みから、nfkc は原文から導出する）
+# ngrams は原文・読み・ローマ字を正規化した文字 bigram / trigram の一覧（検索キー用）
+REPRESENTATIONS = ("kana", "hiragana", "romaji", "nfkc", "ngrams")
+DEFAULT_REPRESENTATIONS = ("kana",)
+# 読み（トークナイズ）が必要な表現
+READING_REPRESENTATIONS = {"kana", "hiragana", "romaji", "ngrams"}
+# 検索キーとして生成する n-gram の長さ
+NGRAM_SIZES = (2, 3)
+# n-gram の区切りとして扱う文字（空白・記号類。区切りをまたぐ n-gram は作らない）
+NGRAM_STRIP_RE = re.compile(r'[\s\W_]+')
+
+# カタカナ（ァ〜ヶ）をひらがなへずらす変換表（KATAKANA_TABLE はその逆）
+HIRAGANA_TABLE = {cp: cp - 0x60 for cp in range(ord("ァ"), ord("ヶ") + 1)}
+KATAKANA_TABLE = {cp - 0x60: cp for cp in range(ord("ァ"), ord("ヶ") + 1)}
+
+# ヘボン式ローマ字の変換表（1 文字）
+ROMAJI_MONO = dict(zip(
+    "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヰヱヲン"
+    "ガギグゲゴザジズゼゾダヂヅデドバビブベボパピプペポヴァィゥェォャュョヮ",
+    "a i u e o ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho "
+    "ma mi mu me mo ya yu yo ra ri ru re ro wa i e o n "
+    "ga gi gu ge go za ji zu ze zo da ji zu de do ba bi bu be bo pa pi pu pe po vu a i u e o ya yu yo wa".split()
+))
+# 拗音・外来音（2 文字）
+ROMAJI_DIGRAPHS = {
+    f"{base}{small}": f"{head}{vowel}"
+    for base, head in [("キ", "ky"), ("ニ", "ny"), ("ヒ", "hy"), ("ミ", "my"), ("リ", "ry"), ("ギ", "gy"),
+                       ("ビ", "by"), ("ピ", "py"), ("シ", "sh"), ("チ", "ch"), ("ジ", "j"), ("ヂ", "j")]
+    for small, vowel in [("ャ", "a"), ("ュ", "u"), ("ョ", "o")]
+}
+ROMAJI_DIGRAPHS.update({
+    "シェ": "she", "ジェ": "je", "チェ": "che", "ティ": "ti", "ディ": "di", "トゥ": "tu", "ドゥ": "du",
+    "テュ": "tyu", "デュ": "dyu", "ファ": "fa", "フィ": "fi", "フェ": "fe", "フォ": "fo", "フュ": "fyu",
+    "ウィ": "wi", "ウェ": "we", "ウォ": "wo", "ヴァ": "va", "ヴィ": "vi", "ヴェ": "ve", "ヴォ": "vo",
+})
+
+
+def to_hiragana(kana):
+    return kana.translate(HIRAGANA_TABLE)
+
+
+def to_romaji(kana):
+    """カタカナ読みをヘボン式ローマ字に変換する（カナ以外の文字はそのまま残す）"""
+    out = []
+    sokuon = False
+    i = 0
+    while i < len(kana):
+        pair = kana[i:i + 2]
+        if pair in ROMAJI_DIGRAPHS:
+            roma = ROMAJI_DIGRAPHS[pair]
+            i += 2
+        else:
+            ch = kana[i]
+            i += 1
+            if ch == "ッ":
+                sokuon = True
+                continue
+            if ch == "ー":
+                # 長音は直前の母音を重ねる
+                if out and out[-1][-1:] in "aiueo":
+                    out.append(out[-1][-1])
+                continue
+            roma = ROMAJI_MONO.get(ch, ch)
+        if sokuon:
+            # 促音は次の子音を重ねる（チ行は t）
+            if roma[:1] not in "aiueon" and roma[:1].isalpha():
+                roma = ("t" if roma.startswith("ch") else roma[0]) + roma
+            sokuon = False
+        out.append(roma)
+    return "".join(out)
+
+
+def normalize_for_search(text):
+    """検索キー用の正規化（NFKC・小文字化・ひらがな→カタカナ）を行い、空白・記号で語に分割する"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = text.translate(KATAKANA_TABLE)
+    return [word for word in NGRAM_STRIP_RE.split(text) if word]
+
+
+@lru_cache(maxsize=65536)
+def _word_ngrams(word):
+    return tuple([word[i:i + n] for n in NGRAM_SIZES for i in range(len(word) - n + 1)])
+
+
+def char_ngrams(words):
+    """語の一覧から n-gram 集合を作る
+    名称を区切った語は平均 4〜5 文字と短く、エリア名・科名などで同じ語が繰り返し現れるため、
+    n-gram は語単位で 1 度だけ生成してインスタンス内で再利用する
+    """
+    grams = set()
+    for word in words:
+        grams.update(_word_ngrams(word))
+    return grams
+
+
+def search_ngrams(text, kana):
+    """原文・読み・ローマ字から正規化済みの n-gram 一覧（ソート済み）を作る"""
+    words = set()
+    for source in (text, kana, to_romaji(kana)):
+        words.update(normalize_for_search(source))
+    return sorted(char_ngrams(words))
+
+
+def text_forms(text, kana, representations):
+    """1 回のトークナイズ結果（kana）から要求された表現をまとめて作る"""
+    forms = {}
+    for rep in representations:
+        if rep == "kana":
+            forms[rep] = kana
+        elif rep == "hiragana":
+            forms[rep] = to_hiragana(kana)
+        elif rep == "romaji":
+            forms[rep] = to_romaji(kana)
+        elif rep == "nfkc":
+            forms[rep] = unicodedata.normalize("NFKC", text)
+        elif rep == "ngrams":
+            forms[rep] = search_ngrams(text, kana)
+    return forms
+
+
+def parse_representations(value):
+    """リクエストで指定された表現の一覧を検証する（未指定時は kana のみ）"""
+    if not value:
+        return DEFAULT_REPRESENTATIONS
+    if isinstance(value, str):
+        value = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = [v for v in value if v not in REPRESENTATIONS]
+    if unknown:
+        raise ValueError(f"Unknown representations: {unknown}. Available: {list(REPRESENTATIONS)}")
+    return tuple(dict.fromkeys(value))
+
+
+def _needs_kana(k, v):
+    return k != "id" and isinstance(v, str) and v.strip()
+
+
+def convert_item(item, kana_only=False, readings=None, representations=DEFAULT_REPRESENTATIONS):
+    """1 件のアイテムについて、id 以外の文字列フィールドに *_kana（と要求された *_hiragana 等）を付与する
+    kana_only=True の場合は入力値を返さず、id と変換結果のフィールドのみを返す
+    readings が与えられた場合は変換済みの表現を引き当てる（バッチ内の重複排除用）
+    """
+    needs_reading = not READING_REPRESENTATIONS.isdisjoint(representations)
+    processed_item = {}
+    for k, v in item.items():
+        if k == "id" or not kana_only:
+            processed_item[k] = v
+        if _needs_kana(k, v):
+            if readings is not None:
+                forms = readings[v]
+            else:
+                forms = text_forms(v, to_kana(v) if needs_reading else None, representations)
+            for rep, value in forms.items():
+                processed_item[f'{k}_{rep}'] = value
+    return processed_item
+
+
+def _convert_chunk(texts):
+    """ワーカープロセスで実行されるチャンク単位の変換（キャッシュは親プロセスで引き済みのため引かない）
+    (読みの一覧, このチャンクで変換経路ごとに数えた単語数) を返す（親プロセスの span_stats に合算する）
+    """
+    before = dict(span_stats)
+    readings = [_tokenize_to_kana(text) for text in texts]
+    return readings, {k: span_stats[k] - before[k] for k in span_stats}
+
+
+def _resolve_workers():
+    if KANA_WORKERS == "auto":
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+    return int(KANA_WORKERS)
+
+
+# プロセスプールはインスタンス内で使い回す（ワーカーごとの辞書ロードは初回のみ）
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers):
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn で起動し、各ワーカーは起動時に 1 度だけ Sudachi 辞書・ドメイン辞書をロードする
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=preload)
+    return _executor
+
+
+def _chunk_texts(texts, workers):
+    """件数と文字数の両方が上限を超えないように、入力順のままチャンクに分ける
+    上限はワーカー数で均等に割った値（と KANA_PARALLEL_CHUNK_SIZE / KANA_PARALLEL_CHUNK_CHARS の小さい方）
+    """
+    max_items = min(KANA_PARALLEL_CHUNK_SIZE, math.ceil(len(texts) / workers))
+    max_chars = min(KANA_PARALLEL_CHUNK_CHARS, math.ceil(sum(len(t) for t in texts) / workers))
+    chunks, chunk, chars = [], [], 0
+    for text in texts:
+        if chunk and (len(chunk) >= max_items or chars + len(text) > max_chars):
+            chunks.append(chunk)
+            chunk, chars = [], 0
+        chunk.append(text)
+        chars += len(text)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def convert_texts(texts):
+    """文字列一覧を読みに変換する。件数が多い場合は設定に応じて複数プロセスへ分散する（結果の順序は入力と同じ）
+    分散する場合も、キャッシュ・読みキャッシュは親プロセスで引き、引けなかった文字列だけをワーカーへ送る
+    （ヒット数・変換経路の統計は親プロセスに集計される）
+    """
+    workers = _resolve_workers()
+    if workers <= 1 or len(texts) < KANA_PARALLEL_MIN_ITEMS:
+        return [to_kana(text) for text in texts], {"workers": 1, "chunks": 1}
+
+    results = [_cached_kana(text) for text in texts]
+    missing = [i for i, kana in enumerate(results) if kana is None]
+    if len(missing) < KANA_PARALLEL_MIN_ITEMS:
+        converted = [_tokenize_to_kana(texts[i]) for i in missing]
+        chunks = [missing] if missing else []
+        workers_used = 1
+    else:
+        chunks = _chunk_texts([texts[i] for i in missing], workers)
+        converted = []
+        for chunk_results, chunk_spans in _get_executor(workers).map(_convert_chunk, chunks):
+            converted.extend(chunk_results)
+            for k, count in chunk_spans.items():
+                span_stats[k] += count
+        workers_used = workers
+    for i, kana in zip(missing, converted):
+        results[i] = kana
+        kana_cache.put(texts[i], kana)
+    return results, {"workers": workers_used, "chunks": len(chunks)}
+
+
+def convert_items(items, kana_only=False, representations=DEFAULT_REPRESENTATIONS):
+    """アイテム一覧を変換する
+    バッチ内の変換対象文字列を先に集め、（KANA_DEDUPE 有効時は）重複を除いて 1 回ずつ変換してから各アイテムへ割り当てる
+    複数の表現を要求された場合も、トークナイズは 1 文字列につき 1 回のみ行う
+    """
+    texts = [v for item in items for k, v in item.items() if _needs_kana(k, v)]
+    total = len(texts)
+    if KANA_DEDUPE:
+        # 読みはフィールドに依存しないため、値のみで重複排除する（出現順を維持）
+        texts = list(dict.fromkeys(texts))
+
+    if READING_REPRESENTATIONS.isdisjoint(representations):
+        # nfkc のみの場合はトークナイズ不要
+        kana_list, parallel_stats = [None] * len(texts), {"workers": 0, "chunks": 0}
+    else:
+        kana_list, parallel_stats = convert_texts(texts)
+    readings = {text: text_forms(text, kana, representations) for text, kana in zip(texts, kana_list)}
+    results = [convert_item(item, kana_only, readings, representations) for item in items]
+
+    dedupe_stats = {
+        "total": total,
+        "unique": len(texts),
+        "unique_ratio": round(len(texts) / total, 4) if total else 0.0,
+    }
+    return results, {"parallel": parallel_stats, "dedupe": dedupe_stats}
+
+
+def convert_calls(calls, representation="kana"):
+    """BigQuery Remote Function のバッチ（calls: 各行の引数リスト）を変換し、行と同じ順序の replies を返す
+    第 1 引数の文字列を representation の表現に変換する（NULL は NULL のまま、空白のみの文字列はそのまま返す）
+    バッチ内の重複文字列は 1 回だけ変換する
+    """
+    texts = [call[0] if call and isinstance(call[0], str) else None for call in calls]
+    targets = [t for t in texts if t is not None and t.strip()]
+    total = len(targets)
+    if KANA_DEDUPE:
+        targets = list(dict.fromkeys(targets))
+
+    if representation in READING_REPRESENTATIONS:
+        kana_list, parallel_stats = convert_texts(targets)
+    else:
+        kana_list, parallel_stats = [None] * len(targets), {"workers": 0, "chunks": 0}
+    converted = {}
+    for text, kana in zip(targets, kana_list):
+        value = text_forms(text, kana, (representation,))[representation]
+        # 戻り値は STRING のため、n-gram は空白区切りにする
+        converted[text] = " ".join(value) if isinstance(value, list) else value
+
+    replies = [converted.get(t, t) for t in texts]
+    dedupe_stats = {
+        "total": total,
+        "unique": len(targets),
+        "unique_ratio": round(len(targets) / total, 4) if total else 0.0,
+    }
+    return replies, {"parallel": parallel_stats, "dedupe": dedupe_stats}
@@ -0,0 +1,110 @@
+"""
+海洋生物・ダイビングエリアの読み辞書（ドメイン辞書）
+
+生物名・科名・エリア名などの表記と読みを Aho-Corasick オートマトンに載せ、
+文字列中の最長一致部分を Sudachi を通さずに読みへ置き換えるために使う。
+辞書ファイルは `表記<TAB>読み` の TSV（`#` 始まりはコメント）。
+"""
+from collections import deque
+
+
+class DomainLexicon:
+    """Aho-Corasick による最長一致の読み辞書"""
+
+    def __init__(self, entries):
+        # ノードは配列で保持する（goto: 遷移, fail: 失敗遷移, lengths: そのノードで終わる語の長さ一覧）
+        self._goto = [{}]
+        self._fail = [0]
+        self._lengths = [()]
+        self.readings = {}
+        for term, reading in entries:
+            if term and reading:
+                self._add(term)
+                self.readings[term] = reading
+        self._build()
+
+    @classmethod
+    def load(cls, path):
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#"):
+                    continue
+                term, _, reading = line.partition("\t")
+                entries.append((term, reading))
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.readings)
+
+    def _add(self, term):
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._lengths.append(())
+            node = nxt
+        if len(term) not in self._lengths[node]:
+            self._lengths[node] = self._lengths[node] + (len(term),)
+
+    def _build(self):
+        """幅優先で失敗遷移を張り、失敗先で終わる語の長さも引き継ぐ"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._lengths[child] = self._lengths[child] + tuple(
+                    n for n in self._lengths[self._fail[child]] if n not in self._lengths[child])
+        self._first_chars = frozenset(self._goto[0])
+
+    def segments(self, text):
+        """text を (部分文字列, 読み or None) の列に分割する
+        辞書語は左から最長一致で重ならないように採用し、それ以外は読み None の残りとして返す
+        """
+        # 全体が辞書語の場合と、辞書語の先頭文字を 1 つも含まない場合はオートマトンを走らせない
+        if text in self.readings:
+            return [(text, self.readings[text])]
+        if self._first_chars.isdisjoint(text):
+            return [(text, None)]
+
+        # 開始位置ごとに最長の一致終端を求める
+        best_end = {}
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length in self._lengths[node]:
+                start = i + 1 - length
+                if best_end.get(start, 0) < i + 1:
+                    best_end[start] = i + 1
+
+        if not best_end:
+            return [(text, None)]
+
+        result = []
+        rest_start = 0
+        i = 0
+        while i < len(text):
+            end = best_end.get(i)
+            if end is None:
+                i += 1
+                continue
+            if rest_start < i:
+                result.append((text[rest_start:i], None))
+            term = text[i:end]
+            result.append((term, self.readings[term]))
+            i = rest_start = end
+        if rest_start < len(text):
+            result.append((text[rest_start:], None))
+        return result
@@ -1,69 +1,179 @@
+import converter
 import functions_framework
+import gzip
 import json
-from sudachipy import dictionary
-from sudachipy import tokenizer
-
-# Sudachi の初期化（グローバルで行うことでウォームスタート時に再利用）
-tokenizer_obj = dictionary.Dictionary().create()
-mode = tokenizer.Tokenizer.SplitMode.C
-
-import re
-
-def to_kana(text):
-    if not text:
-        return ""
-
-    # 英数字（全角含む）、漢字、ひらがな、カタカナの塊を単語として認識し、それ以外（記号・空白）を区切りとして保持
-    # () で囲むことで、分割後のリストに区切り文字も含まれる
-    word_pattern = r'[a-zA-Z0-9\uFF10-\uFF19\uFF21-\uFF3A\uFF41-\uFF5A\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]'
-    parts = re.split(f'({word_pattern}+)', text)
-
-    kana_parts = []
-    for part in parts:
-        if not part:
-            continue
-
-        # 単語の部分（正規表現にマッチするもの）のみ Sudachi で解析
-        if re.match(f'^{word_pattern}+$', part):
-            tokens = tokenizer_obj.tokenize(part, mode)
-            for m in tokens:
-                reading = m.reading_form()
-                # 読みがあれば採用、ただし万が一「キゴウ」系が出たら表面文字を採用
-                if reading and "キゴウ" not in reading:
-                    kana_parts.append(reading)
-                else:
-                    kana_parts.append(m.surface())
+import os
+import zlib
+from flask import Response, stream_with_context
+
+# BigQuery Remote Function 形式（{"calls": [[...], ...]} -> {"replies": [...]}）を受け付ける
+KANA_REMOTE_FUNCTION = os.environ.get("KANA_REMOTE_FUNCTION", "true").lower() == "true"
+
+
+def _request_stats(convert_stats):
+    """レスポンス・ログに出力する統計（キャッシュ・読みキャッシュ・変換経路と、変換処理ごとの統計）"""
+    return {"cache": converter.kana_cache.stats(), "readings_db": converter.reading_store.stats(),
+            "spans": dict(converter.span_stats), **convert_stats}
+
+
+def _convert_remote_calls(request_json):
+    """Remote Function 形式のリクエストを変換し、(レスポンスボディ, ステータス) を返す
+    表現は CREATE FUNCTION の user_defined_context（{"representation": "kana"}）で指定する
+    エラー時は BigQuery がクエリを失敗させるよう errorMessage と 400 を返す（再試行されない）
+    """
+    calls = request_json["calls"]
+    context = request_json.get("userDefinedContext") or {}
+    representation = context.get("representation", "kana")
+    if not isinstance(calls, list) or representation not in converter.REPRESENTATIONS:
+        return {"errorMessage": "Invalid request. 'calls' list and representation in "
+                                f"{list(converter.REPRESENTATIONS)} required."}, 400
+    # 各 call は引数のリスト（[text]）。それ以外は converter 内で KeyError / TypeError（500）になるため先に弾く
+    invalid = [index for index, call in enumerate(calls) if not isinstance(call, (list, tuple))]
+    if invalid:
+        return {"errorMessage": f"Invalid request. Each call must be a list of arguments (invalid calls: {invalid[:10]})."}, 400
+
+    replies, convert_stats = converter.convert_calls(calls, representation)
+    stats = _request_stats(convert_stats)
+    print(f"Converted {len(replies)} calls. requestId={request_json.get('requestId')} stats={json.dumps(stats)}")
+    return {"replies": replies}, 200
+
+
+def _read_ndjson(stream, gzipped):
+    """NDJSON のリクエストボディを 1 行ずつ読み出す（全体をメモリに載せない）"""
+    if gzipped:
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _convert_ndjson(lines, kana_only, representations):
+    """NDJSON の各行を変換し、1 行分ずつ出力（bytes）を返す
+    JSON として解釈できない行はエラーレコードを返して処理を継続する
+    """
+    count = 0
+    for line_no, line in enumerate(lines, start=1):
+        try:
+            record = converter.convert_item(json.loads(line), kana_only, representations=representations)
+        except (ValueError, AttributeError) as e:
+            record = {"error": f"Invalid record: {e}", "line": line_no}
         else:
-            # 記号や空白の塊はそのまま通す
-            kana_parts.append(part)
+            count += 1
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    print(f"Streamed {count} items. cache={json.dumps(converter.kana_cache.stats())}")
+
+
+def _stream_ndjson(request, kana_only, representations):
+    """NDJSON 入力を 1 レコードずつ変換し、NDJSON（任意で gzip）として逐次返す"""
+    gzip_in = request.headers.get("Content-Encoding", "") == "gzip"
+    gzip_out = "gzip" in request.headers.get("Accept-Encoding", "")
+
+    def generate():
+        # gzip 出力はレコードごとに SYNC_FLUSH し、受信側が到着順に展開できるようにする
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip_out else None
+        for data in _convert_ndjson(_read_ndjson(request.stream, gzip_in), kana_only, representations):
+            if compressor:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield data
+        if compressor:
+            yield compressor.flush()
+
+    headers = {"Content-Type": "application/x-ndjson"}
+    if gzip_out:
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(generate()), 200, headers)
+
+
+def _convert_json(request_json, kana_only, representations):
+    """JSON 形式のリクエストボディを変換し、(レスポンスボディ, ステータス) を返す"""
+    if KANA_REMOTE_FUNCTION and isinstance(request_json, dict) and "calls" in request_json:
+        return _convert_remote_calls(request_json)
+    if not request_json or "items" not in request_json:
+        return {"error": "Invalid request. 'items' list required."}, 400
+
+    if "representations" in request_json:
+        try:
+            representations = converter.parse_representations(request_json["representations"])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+    items = request_json.get("items", [])
+    results, convert_stats = converter.convert_items(items, kana_only, representations)
+
+    stats = _request_stats(convert_stats)
+    print(f"Converted {len(results)} items. stats={json.dumps(stats)}")
+    return {"results": results, "stats": stats}, 200
+
+
+def warmup():
+    """辞書と読みキャッシュをロードし、ロード状況を返す"""
+    converter.preload()
+    return health()
+
+
+def health():
+    """辞書のロード有無を含むインスタンスの状態（ロードは行わない）"""
+    return {
+        "status": "ok",
+        "dictionary_loaded": converter.dictionary_obj is not None,
+        "dictionary_load_ms": converter.dictionary_load_ms,
+        "lexicon_terms": len(converter.domain_lexicon) if converter.domain_lexicon is not None else None,
+        "cache": converter.kana_cache.stats(),
+        "readings_db": converter.reading_store.stats(),
+    }
+
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST',
+    'Access-Control-Allow-Headers': 'Content-Type, Content-Encoding',
+}
 
-    return "".join(kana_parts)
 
 @functions_framework.http
 def fn_to_kana(request):
     """
     POST {"items": [{"id": "...", "name": "..."}, ...]}
-    Returns {"results": [{"id": "...", "name_kana": "..."}, ...]}
+    Returns {"results": [{"id": "...", "name_kana": "..."}, ...], "stats": {...}}
+
+    BigQuery Remote Function として呼ばれた場合（{"calls": [["..."], ...]}）は {"replies": ["...", ...]} を返す。
+
+    Content-Type: application/x-ndjson の場合は 1 行 1 アイテムのストリーミング変換を行う
+    （Content-Encoding / Accept-Encoding: gzip に対応）。
+    クエリ ?output=kana を付けると、結果は id と変換結果（*_kana 等）のみになる。
+    "representations": ["kana", "hiragana", "romaji", "nfkc"]（または ?representations=kana,romaji）で
+    出力する表現を選べる。いずれも 1 回のトークナイズ結果から導出する。
+
+    GET /warmup は辞書をロードして状態を返す（スケジューラや起動直後のプリウォーム用）。
+    GET /healthz は辞書をロードせずに状態のみ返す。
     """
     if request.method == 'OPTIONS':
-        return ('', 204, {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST',
-            'Access-Control-Allow-Headers': 'Content-Type',
-        })
+        return ('', 204, CORS_HEADERS)
 
-    request_json = request.get_json(silent=True)
-    if not request_json or "items" not in request_json:
-        return ({"error": "Invalid request. 'items' list required."}, 400)
+    if request.method == 'GET':
+        if request.path.rstrip("/").endswith("/warmup"):
+            return (warmup(), 200)
+        return (health(), 200)
 
-    items = request_json.get("items", [])
-    results = []
-
-    for item in items:
-        processed_item = {}
-        for k, v in item.items():
-            processed_item[k] = v
-            if k != "id" and isinstance(v, str) and v.strip():
-                processed_item[f'{k}_kana'] = to_kana(v)
-        results.append(processed_item)
-    return ({"results": results}, 200, {'Content-Type': 'application/json'})
+    kana_only = request.args.get("output") == "kana"
+    try:
+        representations = converter.parse_representations(request.args.get("representations"))
+    except ValueError as e:
+        return ({"error": str(e)}, 400)
+
+    if request.mimetype == "application/x-ndjson":
+        return _stream_ndjson(request, kana_only, representations)
+
+    body, status = _convert_json(request.get_json(silent=True), kana_only, representations)
+    return (body, status, {'Content-Type': 'application/json'})
+
+
+def __getattr__(name):
+    """ASGI 版のエントリポイント（fn_to_kana_async）は参照された場合のみ main_async から読み込む
+    （同期版 fn_to_kana のコールドスタートで ASGI 関連のモジュールを import しないため）
+    """
+    if name == "fn_to_kana_async":
+        import main_async
+        return main_async.fn_to_kana_async
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,100 @@
+"""
+fn_to_kana の ASGI 版（エントリポイント fn_to_kana_async）
+
+ASGI 関連のモジュール（functions_framework.aio / starlette）は同期版 fn_to_kana のコールドスタートで読み込まないよう、
+このモジュールに分けている。main.fn_to_kana_async を参照した時点で読み込まれる。
+"""
+import asyncio
+import converter
+import functions_framework.aio
+import gzip
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from starlette.responses import JSONResponse, Response as AsgiResponse
+
+from main import CORS_HEADERS, _convert_json, _convert_ndjson, _read_ndjson, health
+
+# ASGI モード（fn_to_kana_async）で変換を実行するスレッド数
+KANA_ASYNC_WORKERS = int(os.environ.get("KANA_ASYNC_WORKERS", "4"))
+# ASGI モードで同時に受け付ける変換リクエスト数（実行中 + 待ち）。超えた分は 503 を返す
+KANA_ASYNC_MAX_PENDING = int(os.environ.get("KANA_ASYNC_MAX_PENDING", "64"))
+
+# ASGI モードの変換用スレッドプールと、受付中のリクエスト数（イベントループのスレッドからのみ更新する）
+_async_executor = None
+_async_pending = 0
+_async_rejected = 0
+
+
+def async_health():
+    """health に ASGI モードの受付状況を加えたもの"""
+    return {**health(), "async": {"workers": KANA_ASYNC_WORKERS, "pending": _async_pending, "rejected": _async_rejected}}
+
+
+async def _run_in_pool(func, *args):
+    """変換処理をスレッドプールで実行する（イベントループは次のリクエストの受付を続ける）
+    受付中のリクエストが KANA_ASYNC_MAX_PENDING に達している場合は実行せずに None を返す
+    """
+    global _async_executor, _async_pending, _async_rejected
+    if _async_pending >= KANA_ASYNC_MAX_PENDING:
+        _async_rejected += 1
+        return None
+    if _async_executor is None:
+        _async_executor = ThreadPoolExecutor(max_workers=KANA_ASYNC_WORKERS, thread_name_prefix="kana")
+    _async_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_async_executor, func, *args)
+    finally:
+        _async_pending -= 1
+
+
+def _convert_ndjson_body(body, gzip_in, gzip_out, kana_only, representations):
+    """NDJSON のリクエストボディ全体を変換する（ASGI モード用。逐次返却はしない）"""
+    data = b"".join(_convert_ndjson(_read_ndjson(io.BytesIO(body), gzip_in), kana_only, representations))
+    return gzip.compress(data) if gzip_out else data
+
+
+@functions_framework.aio.http
+async def fn_to_kana_async(request):
+    """
+    fn_to_kana の ASGI 版（リクエスト・レスポンス形式は同じ）。
+    1 インスタンスで複数のリクエストを同時に受け付け、変換は KANA_ASYNC_WORKERS 本のスレッドで実行する。
+    受付中のリクエストが KANA_ASYNC_MAX_PENDING を超えた場合は 503 を返す。
+    NDJSON はリクエスト全体を受信してから変換し、まとめて返す。
+    """
+    if request.method == 'OPTIONS':
+        return AsgiResponse('', 204, CORS_HEADERS)
+
+    if request.method == 'GET':
+        if request.url.path.rstrip("/").endswith("/warmup"):
+            # 受付数の上限に達している場合はロードせずに状態のみ返す
+            await _run_in_pool(converter.preload)
+            return JSONResponse(async_health())
+        return JSONResponse(async_health())
+
+    kana_only = request.query_params.get("output") == "kana"
+    try:
+        representations = converter.parse_representations(request.query_params.get("representations"))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, 400)
+
+    body = await request.body()
+    if request.headers.get("Content-Type", "").split(";")[0].strip() == "application/x-ndjson":
+        gzip_out = "gzip" in request.headers.get("Accept-Encoding", "")
+        result = await _run_in_pool(
+            _convert_ndjson_body, body, request.headers.get("Content-Encoding", "") == "gzip", gzip_out,
+            kana_only, representations)
+        if result is None:
+            return JSONResponse({"error": "Too many concurrent requests."}, 503, {"Retry-After": "1"})
+        headers = {"Content-Encoding": "gzip"} if gzip_out else {}
+        return AsgiResponse(result, 200, headers, media_type="application/x-ndjson")
+
+    try:
+        request_json = json.loads(body) if body else None
+    except ValueError:
+        request_json = None
+    result = await _run_in_pool(_convert_json, request_json, kana_only, representations)
+    if result is None:
+        return JSONResponse({"error": "Too many concurrent requests."}, 503, {"Retry-After": "1"})
+    return JSONResponse(*result)
@@ -0,0 +1,544 @@
+"""
+データウェアハウスの抽象化（enricher / exporter 共通）
+
+本番は BigQuery、ローカルでは SQLite ファイルを同じインターフェース（クエリ → 行、一時テーブルへのロード、MERGE）で扱う。
+SQLite 版は bigquery/tables・bigquery/views の SQL（BigQuery 方言）を変換して `*_raw_changelog` テーブル・`*_raw_latest` ビューと
+`v_app_*` ビューを作成できるため、GCP に接続せずに enricher / exporter を実行・計測できる。
+
+deploy.sh はデプロイ時にこのファイルを各関数のディレクトリへコピーする。
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# 使用するウェアハウス（bigquery / sqlite）
+WAREHOUSE = os.environ.get("WAREHOUSE", "bigquery")
+# WAREHOUSE=sqlite の場合のデータベースファイル
+WAREHOUSE_SQLITE_PATH = os.environ.get("WAREHOUSE_SQLITE_PATH", "warehouse.db")
+
+# 1 ジョブあたりの課金バイト数の上限（BigQuery の maximum_bytes_billed。超える見込みのクエリは実行前にエラーになる）。0 で無制限
+WAREHOUSE_MAX_BYTES_BILLED = int(os.environ.get("WAREHOUSE_MAX_BYTES_BILLED", str(10 * 1024 ** 3)))
+
+# Firestore → BigQuery 拡張機能が作成する *_raw_latest / *_raw_changelog の列
+RAW_COLUMNS = ["timestamp", "event_id", "document_name", "operation", "data", "old_data", "document_id"]
+# SQLite 版の changelog の timestamp 列の書式
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+class QueryStats:
+    """ジョブごとの処理バイト数・課金バイト数・スロット時間・所要時間を記録し、ラベル（テーブル・ビュー）ごとに集計する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_label = {}
+
+    def record(self, label, kind, started, bytes_processed=None, bytes_billed=None, slot_ms=None, error=None):
+        duration_ms = round((time.time() - started) * 1000, 1)
+        # 1 ジョブ 1 行の JSON（Cloud Logging で集計できるように）
+        print(json.dumps({"warehouse_job": kind, "label": label, "bytes_processed": bytes_processed,
+                          "bytes_billed": bytes_billed, "slot_ms": slot_ms, "ms": duration_ms, "error": error}))
+        with self._lock:
+            stats = self.by_label.setdefault(label, {"jobs": 0, "errors": 0, "bytes_processed": 0, "bytes_billed": 0,
+                                                     "slot_ms": 0, "duration_ms": 0.0})
+            stats["jobs"] += 1
+            stats["errors"] += 1 if error else 0
+            stats["bytes_processed"] += bytes_processed or 0
+            stats["bytes_billed"] += bytes_billed or 0
+            stats["slot_ms"] += slot_ms or 0
+            stats["duration_ms"] = round(stats["duration_ms"] + duration_ms, 1)
+
+    def summary(self):
+        """{ラベル: 集計, ..., "total": 全体の集計} を返す"""
+        with self._lock:
+            summary = {label: dict(stats) for label, stats in sorted(self.by_label.items())}
+        total = {}
+        for stats in summary.values():
+            for k, v in stats.items():
+                total[k] = total.get(k, 0) + v
+        if "duration_ms" in total:
+            total["duration_ms"] = round(total["duration_ms"], 1)
+        summary["total"] = total
+        return summary
+
+
+class BigQueryWarehouse:
+    """BigQuery（本番）
+    各メソッドの label は実行統計（stats）の集計単位。省略時は対象のテーブル・ビュー名
+    """
+
+    def __init__(self, project_id, dataset_id):
+        from google.cloud import bigquery
+
+        self._bigquery = bigquery
+        self.client = bigquery.Client(project=project_id)
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.stats = QueryStats()
+        self._read_client = None
+        self._read_client_lock = threading.Lock()
+
+    def table(self, name):
+        return f"`{self.project_id}.{self.dataset_id}.{name}`"
+
+    def _query(self, sql, label, kind, fetch=None, job_config=None):
+        """クエリジョブを実行して統計を記録し、fetch(結果) を返す（maximum_bytes_billed を適用）"""
+        job_config = job_config or self._bigquery.QueryJobConfig()
+        if WAREHOUSE_MAX_BYTES_BILLED:
+            job_config.maximum_bytes_billed = WAREHOUSE_MAX_BYTES_BILLED
+        started = time.time()
+        job = None
+        try:
+            job = self.client.query(sql, job_config=job_config)
+            result = job.result()
+            value = fetch(result) if fetch else None
+        except Exception as e:
+            self.stats.record(label, kind, started, error=str(e))
+            raise
+        self.stats.record(label, kind, started, job.total_bytes_processed, job.total_bytes_billed, job.slot_millis)
+        return job, value
+
+    def query_rows(self, sql, label="query"):
+        """クエリを実行し、(行の dict 一覧, 処理バイト数) を返す"""
+        job, rows = self._query(sql, label, "query", lambda result: [dict(row.items()) for row in result])
+        return rows, job.total_bytes_processed
+
+    def query_dataframe(self, sql, label="query"):
+        _, df = self._query(sql, label, "query", lambda result: result.to_dataframe())
+        return df
+
+    def query_arrow(self, sql, label="query"):
+        """クエリ結果を Arrow の Table（レコードバッチの集まり）で返す
+        google-cloud-bigquery-storage がある場合は Storage Read API で並列に読み出す（無ければ REST のページング）
+        """
+        _, table = self._query(sql, label, "query",
+                               lambda result: result.to_arrow(bqstorage_client=self._storage_client(),
+                                                              create_bqstorage_client=False))
+        return table
+
+    def _storage_client(self):
+        # Storage Read API のクライアントはスレッド間で共有する（作成できない場合は None）
+        with self._read_client_lock:
+            if self._read_client is None:
+                try:
+                    from google.cloud import bigquery_storage
+
+                    self._read_client = bigquery_storage.BigQueryReadClient()
+                except ImportError:
+                    self._read_client = False
+            return self._read_client or None
+
+    def load_rows(self, name, rows, label=None):
+        """行一覧でテーブルを置き換える（MERGE 用の一時テーブル。ロードジョブは課金されないため時間のみ記録）"""
+        job_config = self._bigquery.LoadJobConfig(write_disposition="WRITE_TRUNCATE")
+        table_id = f"{self.project_id}.{self.dataset_id}.{name}"
+        started = time.time()
+        try:
+            self.client.load_table_from_json(rows, table_id, job_config=job_config).result()
+        except Exception as e:
+            self.stats.record(label or name, "load", started, error=str(e))
+            raise
+        self.stats.record(label or name, "load", started)
+
+    def merge(self, target, source, key, columns, label=None):
+        """source の行で target を更新（key が一致）または追加し、updated_at を現在時刻にする"""
+        set_clauses = [f"t.{c} = s.{c}" for c in columns]
+        insert_fields = [key, *columns, "updated_at"]
+        insert_values = [f"s.{c}" for c in [key, *columns]] + ["CURRENT_TIMESTAMP()"]
+        merge_query = f"""
+        MERGE {self.table(target)} t
+        USING {self.table(source)} s
+        ON t.{key} = s.{key}
+        WHEN MATCHED THEN
+          UPDATE SET {", ".join(set_clauses)}, updated_at = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN
+          INSERT ({", ".join(insert_fields)}) VALUES ({", ".join(insert_values)})
+        """
+        self._query(merge_query, label or target, "merge")
+
+    def delete(self, target, key, values, label=None):
+        """key が values のいずれかに一致する行を削除する"""
+        bigquery = self._bigquery
+        job_config = bigquery.QueryJobConfig(query_parameters=[bigquery.ArrayQueryParameter("keys", "STRING", values)])
+        self._query(f"DELETE FROM {self.table(target)} WHERE {key} IN UNNEST(@keys)", label or target, "delete",
+                    job_config=job_config)
+
+
+# ---- SQLite（ローカル） ----
+
+# BigQuery の型名 -> SQLite の型名（STRING のままだと NUMERIC 型親和性になり、数字だけの文字列が数値に変わる）
+SQLITE_TYPES = {"STRING": "TEXT", "FLOAT64": "REAL", "INT64": "INTEGER", "BOOL": "INTEGER", "TIMESTAMP": "TEXT",
+                "JSON": "TEXT"}
+# TIMESTAMP('...') は関数呼び出しのため型名として置き換えない
+TYPE_RE = re.compile(r'\b(' + "|".join(SQLITE_TYPES) + r')\b(?!\()')
+# `project.dataset`.table / `project.dataset.table` -> "table"
+QUALIFIED_TABLE_RE = re.compile(r'`[^`]*`\.(\w+)|`[^`]*\.(\w+)`')
+EXTRACT_RE = re.compile(r'\bEXTRACT\((\w+) FROM ')
+ADD_COLUMN_RE = re.compile(r'ADD COLUMN IF NOT EXISTS (\w+) (\w+)')
+ALTER_TABLE_RE = re.compile(r'ALTER TABLE\s+"?(\w+)"?')
+
+
+def _rewrite_calls(sql, name, rewrite):
+    """name(...) の呼び出しを、括弧の対応を取りながら rewrite(引数部分の文字列) の結果に置き換える"""
+    pattern = re.compile(r'\b' + name + r'\(')
+    while True:
+        m = pattern.search(sql)
+        if not m:
+            return sql
+        depth, i = 1, m.end()
+        while depth:
+            depth += {"(": 1, ")": -1}.get(sql[i], 0)
+            i += 1
+        sql = sql[:m.start()] + rewrite(sql[m.end():i - 1]) + sql[i:]
+
+
+def _array_agg(args):
+    # ARRAY_AGG(expr ORDER BY key) -> BQ_ARRAY_AGG(expr, key)（SQLite 3.44 未満は集約関数内の ORDER BY 非対応）
+    parts = re.split(r'\s+ORDER BY\s+', args, maxsplit=1)
+    return f"BQ_ARRAY_AGG({parts[0]}, {parts[1] if len(parts) > 1 else 'NULL'})"
+
+
+def translate_sql(sql):
+    """BigQuery 方言の SQL を SQLite で実行できる形に変換する（本リポジトリの SQL で使う構文のみ対応）"""
+    sql = QUALIFIED_TABLE_RE.sub(lambda m: f'"{m.group(1) or m.group(2)}"', sql)
+    sql = sql.replace("CURRENT_TIMESTAMP()", "CURRENT_TIMESTAMP")
+    sql = EXTRACT_RE.sub(lambda m: f"BQ_EXTRACT('{m.group(1)}', ", sql)
+    sql = _rewrite_calls(sql, "ARRAY_AGG", _array_agg)
+    sql = re.sub(r'\bSTRUCT\(', "json_array(", sql)
+    return TYPE_RE.sub(lambda m: SQLITE_TYPES[m.group(1)], sql)
+
+
+@lru_cache(maxsize=256)
+def _parse_json(doc):
+    # 同じ行の data 列から複数のフィールドを取り出すため、直近のパース結果を再利用する
+    return json.loads(doc)
+
+
+@lru_cache(maxsize=1024)
+def _parse_path(path):
+    """'$.a.b[0]' -> ('a', 'b', 0)"""
+    return tuple(key or int(index) for key, index in re.findall(r'\.(\w+)|\[(\d+)\]', path[1:]))
+
+
+def _json_path(doc, path):
+    """'$.a.b[0]' 形式のパスで値を取り出す（見つからない場合は KeyError）"""
+    value = _parse_json(doc)
+    for key in _parse_path(path):
+        value = value[key]
+    return value
+
+
+def _json_value(doc, path):
+    """BigQuery の JSON_VALUE（スカラーのみ文字列で返し、オブジェクト・配列・null は NULL）"""
+    if doc is None:
+        return None
+    try:
+        value = _json_path(doc, path)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _json_query(doc, path):
+    """BigQuery の JSON_QUERY（値を JSON 文字列で返す）"""
+    if doc is None:
+        return None
+    try:
+        value = _json_path(doc, path)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    return None if value is None else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _concat(*args):
+    # BigQuery の CONCAT は引数に NULL があれば NULL
+    if any(a is None for a in args):
+        return None
+    return "".join(str(a) for a in args)
+
+
+def _farm_fingerprint(value):
+    # FarmHash とは値が異なるが、ローカルでの変更検出には同じ入力に同じ値を返せばよい
+    if value is None:
+        return None
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _to_json_string(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _extract(part, value):
+    if value is None:
+        return None
+    try:
+        return getattr(datetime.fromisoformat(str(value).replace("Z", "+00:00")), part.lower())
+    except (ValueError, AttributeError):
+        return None
+
+
+def _timestamp(value):
+    # TIMESTAMP('...') -> UTC の 'YYYY-MM-DDTHH:MM:SS.ffffff'（insert_documents が書き込む timestamp と文字列で比較できる形）
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+def _array_to_string(array_json, separator):
+    if array_json is None:
+        return None
+    return separator.join(str(v) for v in json.loads(array_json) if v is not None)
+
+
+class _ArrayAgg:
+    """ARRAY_AGG(expr ORDER BY key) 相当（JSON 配列の文字列を返す）"""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value, key):
+        self.values.append((key, value))
+
+    def finalize(self):
+        ordered = sorted(self.values, key=lambda kv: (kv[0] is None, kv[0]))
+        return json.dumps([v for _, v in ordered], ensure_ascii=False)
+
+
+class _AnyValue:
+    def __init__(self):
+        self.value = None
+
+    def step(self, value):
+        if self.value is None:
+            self.value = value
+
+    def finalize(self):
+        return self.value
+
+
+class SQLiteWarehouse:
+    """SQLite ファイルによるローカルのウェアハウス（接続はスレッドごとに作成する）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # 書き込み（ロード・MERGE）は 1 スレッドずつ行う
+        self._write_lock = threading.Lock()
+        # SQLite では処理バイト数・スロット時間は得られないため、ジョブ数と所要時間のみ記録する
+        self.stats = QueryStats()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.create_function("JSON_VALUE", 2, _json_value, deterministic=True)
+            conn.create_function("JSON_QUERY", 2, _json_query, deterministic=True)
+            conn.create_function("CONCAT", -1, _concat, deterministic=True)
+            conn.create_function("FARM_FINGERPRINT", 1, _farm_fingerprint, deterministic=True)
+            conn.create_function("TO_JSON_STRING", 1, _to_json_string, deterministic=True)
+            conn.create_function("BQ_EXTRACT", 2, _extract, deterministic=True)
+            conn.create_function("ARRAY_TO_STRING", 2, _array_to_string, deterministic=True)
+            conn.create_function("TIMESTAMP", 1, _timestamp, deterministic=True)
+            conn.create_aggregate("BQ_ARRAY_AGG", 2, _ArrayAgg)
+            conn.create_aggregate("ANY_VALUE", 1, _AnyValue)
+            self._local.conn = conn
+        return conn
+
+    def table(self, name):
+        return f'"{name}"'
+
+    def _run(self, label, kind, fn):
+        started = time.time()
+        try:
+            value = fn()
+        except Exception as e:
+            self.stats.record(label, kind, started, error=str(e))
+            raise
+        self.stats.record(label, kind, started)
+        return value
+
+    def query_rows(self, sql, label="query"):
+        def fetch():
+            cursor = self._connect().execute(translate_sql(sql))
+            columns = [d[0] for d in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+        return self._run(label, "query", fetch), None
+
+    def query_dataframe(self, sql, label="query"):
+        import pandas as pd
+
+        return self._run(label, "query", lambda: pd.read_sql_query(translate_sql(sql), self._connect()))
+
+    def query_arrow(self, sql, label="query"):
+        return self._run(label, "query", lambda: self._query_arrow(sql))
+
+    def _query_arrow(self, sql):
+        import pyarrow as pa
+
+        cursor = self._connect().execute(translate_sql(sql))
+        names = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+        columns = list(zip(*rows)) if rows else [() for _ in names]
+        return pa.table({name: _arrow_array(pa, values) for name, values in zip(names, columns)})
+
+    def load_rows(self, name, rows, label=None):
+        self._run(label or name, "load", lambda: self._load_rows(name, rows))
+
+    def _load_rows(self, name, rows):
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'CREATE TABLE "{name}" ({", ".join(columns)})')
+            conn.executemany(
+                f'INSERT INTO "{name}" VALUES ({", ".join("?" for _ in columns)})',
+                [[_sqlite_value(row.get(c)) for c in columns] for row in rows])
+
+    def merge(self, target, source, key, columns, label=None):
+        self._run(label or target, "merge", lambda: self._merge(target, source, key, columns))
+
+    def _merge(self, target, source, key, columns):
+        set_clauses = ", ".join(f"{c} = s.{c}" for c in columns)
+        insert_fields = ", ".join([key, *columns, "updated_at"])
+        select_values = ", ".join([f"s.{c}" for c in [key, *columns]] + ["CURRENT_TIMESTAMP"])
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute(f'''
+                UPDATE "{target}" SET {set_clauses}, updated_at = CURRENT_TIMESTAMP
+                FROM "{source}" s WHERE "{target}".{key} = s.{key}''')
+            conn.execute(f'''
+                INSERT INTO "{target}" ({insert_fields})
+                SELECT {select_values} FROM "{source}" s
+                WHERE NOT EXISTS (SELECT 1 FROM "{target}" t WHERE t.{key} = s.{key})''')
+
+    def delete(self, target, key, values, label=None):
+        self._run(label or target, "delete", lambda: self._delete(target, key, values))
+
+    def _delete(self, target, key, values):
+        conn = self._connect()
+        with self._write_lock, conn:
+            # SQLite のバインド変数の上限（古いバージョンは 999）を超えないよう分割する
+            for i in range(0, len(values), 500):
+                chunk = values[i:i + 500]
+                conn.execute(f'DELETE FROM "{target}" WHERE {key} IN ({", ".join("?" for _ in chunk)})', chunk)
+
+    # ---- ローカル環境の構築用 ----
+
+    def create_raw_table(self, name):
+        """Firestore → BigQuery 拡張機能と同じ構成の *_raw_changelog テーブルと *_raw_latest ビュー
+        （ドキュメントごとの最新の行、削除済みを除く）を作成する（既存の行は削除）
+        """
+        changelog = _changelog_table(name)
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute(f'DROP VIEW IF EXISTS "{name}"')
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'DROP TABLE IF EXISTS "{changelog}"')
+            conn.execute(f'CREATE TABLE "{changelog}" ({", ".join(RAW_COLUMNS)})')
+            conn.execute(f'CREATE INDEX "{changelog}_document_id" ON "{changelog}" (document_id)')
+            conn.execute(f'CREATE INDEX "{changelog}_timestamp" ON "{changelog}" (timestamp)')
+            conn.execute(f'''
+                CREATE VIEW "{name}" AS
+                SELECT {", ".join(RAW_COLUMNS)} FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY document_id ORDER BY timestamp DESC, rowid DESC) AS rn
+                    FROM "{changelog}"
+                ) WHERE rn = 1 AND operation != 'DELETE'
+            ''')
+
+    def insert_documents(self, name, documents, operation="CREATE"):
+        """(document_id, data) の一覧を *_raw_changelog に追加する（operation="DELETE" の場合 data は不要）"""
+        now = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.executemany(
+                f'INSERT INTO "{_changelog_table(name)}" (timestamp, operation, data, document_id) VALUES (?, ?, ?, ?)',
+                [(now, operation, None if data is None else json.dumps(data, ensure_ascii=False), doc_id)
+                 for doc_id, data in documents])
+
+    def apply_sql_file(self, path):
+        """bigquery/tables の DDL を適用する（ALTER TABLE ... ADD COLUMN IF NOT EXISTS は未作成の列のみ追加）"""
+        with open(path, encoding="utf-8") as f:
+            sql = translate_sql(f.read())
+        conn = self._connect()
+        for statement in (s.strip() for s in sql.split(";")):
+            body = "\n".join(line for line in statement.splitlines() if not line.strip().startswith("--")).strip()
+            if not body:
+                continue
+            if body.startswith("ALTER TABLE"):
+                table = ALTER_TABLE_RE.match(body).group(1)
+                existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+                for column, column_type in ADD_COLUMN_RE.findall(body):
+                    if column not in existing:
+                        conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {column_type}')
+            else:
+                conn.execute(body)
+        conn.commit()
+
+    def create_views(self, views_dir):
+        """bigquery/views の SQL からビューを作成する（他のビューを参照するビューは後回しにして再試行する）"""
+        pending = {os.path.splitext(f)[0]: os.path.join(views_dir, f)
+                   for f in sorted(os.listdir(views_dir)) if f.endswith(".sql")}
+        conn = self._connect()
+        while pending:
+            created = []
+            errors = {}
+            for name, path in pending.items():
+                with open(path, encoding="utf-8") as f:
+                    body = translate_sql(f.read())
+                try:
+                    conn.execute(f'DROP VIEW IF EXISTS "{name}"')
+                    conn.execute(f'CREATE VIEW "{name}" AS {body}')
+                    # 参照先の存在はクエリ時まで検証されないため、ここで 0 件取得して確認する
+                    conn.execute(f'SELECT * FROM "{name}" LIMIT 0').fetchall()
+                    created.append(name)
+                except sqlite3.Error as e:
+                    conn.execute(f'DROP VIEW IF EXISTS "{name}"')
+                    errors[name] = str(e)
+            if not created:
+                raise RuntimeError(f"Could not create views: {errors}")
+            for name in created:
+                del pending[name]
+        conn.commit()
+
+
+def _arrow_array(pa, values):
+    # SQLite の列は値ごとに型が異なりうるため、1 つの型に推論できない列は文字列にする
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _changelog_table(name):
+    # points_raw_latest -> points_raw_changelog
+    return name[:-len("_raw_latest")] + "_raw_changelog"
+
+
+def _sqlite_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def get_warehouse(project_id=None, dataset_id=None):
+    """環境変数 WAREHOUSE に応じたウェアハウスを返す"""
+    if WAREHOUSE == "sqlite":
+        return SQLiteWarehouse(WAREHOUSE_SQLITE_PATH)
+    return BigQueryWarehouse(project_id, dataset_id)
@@ -0,0 +1,100 @@
+"""
+kana-converter のドメイン辞書 (lexicon.tsv) をシードデータから作成する。
+
+生物名・科名（creatures_seed.json）とエリア名（locations_seed.json）から漢字・かなのみの語を集め、
+辞書にまだ無い語を、現在の変換結果を読みの候補としてコメント行（`# 表記<TAB>読み`）で末尾に追記する。
+辞書に載るのは手で読みを確認してコメントを外した行のみで、既存の行（確認済みの読み）は変更しない。
+
+Usage:
+    python scripts/build_kana_lexicon.py [--seed-dir DIR]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "kana-converter")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "wedive-web", "src", "data")
+# シードファイルが空の場合はバックアップのスナップショットを使う
+SEED_DIRS = [DATA_DIR, os.path.join(DATA_DIR, "backup_20251221")]
+DEFAULT_OUTPUT = os.path.join(FUNCTION_DIR, "lexicon.tsv")
+
+# 読みの曖昧さが問題になるのは漢字を含む語のみ（カナのみの語や 1 文字語は辞書に載せない）
+KANJI_RE = re.compile(r'[一-鿿々]')
+# 英字・記号を含む語は Sudachi の読みが崩れやすく（英単語のアルファベット読みなど）、手で確認できないため候補にしない
+TERM_RE = re.compile(r'[一-鿿々ヶぁ-んァ-ヴー・]+')
+CANDIDATE_PREFIX = "# 未確認: "
+
+
+def load_json(seed_dirs, filename):
+    """空でない最初のシードファイルを読み込む"""
+    for seed_dir in seed_dirs:
+        path = os.path.join(seed_dir, filename)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data:
+                return data
+    return []
+
+
+def collect_terms(seed_dirs):
+    terms = set()
+    for creature in load_json(seed_dirs, "creatures_seed.json"):
+        for field in ("name", "family"):
+            if isinstance(creature.get(field), str):
+                terms.add(creature[field].strip())
+
+    def walk(node):
+        # type を持たず子を持つノードがエリア
+        if not node.get("type") and node.get("children"):
+            terms.add(node["name"].strip())
+        for child in node.get("children", []):
+            walk(child)
+
+    for root in load_json(seed_dirs, "locations_seed.json"):
+        walk(root)
+    return {t for t in terms if len(t) >= 2 and KANJI_RE.search(t) and TERM_RE.fullmatch(t)}
+
+
+def load_existing(path):
+    """辞書ファイルの全行と、登録済み・候補として追記済みの表記を返す"""
+    lines = []
+    known = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                lines.append(line)
+                body = line[len(CANDIDATE_PREFIX):] if line.startswith(CANDIDATE_PREFIX) else line
+                if body and not body.startswith("#"):
+                    known.add(body.partition("\t")[0])
+    return lines, known
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the kana-converter domain lexicon from seed data")
+    parser.add_argument("--seed-dir", action="append", help="Directory with creatures_seed.json / locations_seed.json. Repeatable (first non-empty wins)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    # 辞書自身を使わずに、Sudachi による現在の読みを求める
+    os.environ.update({"KANA_LEXICON": "false", "KANA_CACHE_SIZE": "0", "KANA_READINGS_DB": ""})
+    sys.path.insert(0, FUNCTION_DIR)
+    import converter
+
+    seed_dirs = args.seed_dir or SEED_DIRS
+    terms = collect_terms(seed_dirs)
+    if not terms:
+        sys.exit(f"No terms found under {seed_dirs}")
+    lines, known = load_existing(args.output)
+    candidates = sorted(t for t in terms if t not in known)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for line in lines or ["# 表記\t読み"]:
+            f.write(line + "\n")
+        for term in candidates:
+            f.write(f"{CANDIDATE_PREFIX}{term}\t{converter.to_kana(term)}\n")
+    print(f"Appended {len(candidates)} candidate terms to {os.path.abspath(args.output)} "
+          f"(check each reading and remove the '{CANDIDATE_PREFIX.strip()}' prefix to enable it)")
@@ -0,0 +1,97 @@
+"""
+kana-converter に同梱する読みキャッシュ (readings.db) を作成する。
+
+エンリッチ済みテーブル（creatures_enriched / points_enriched / areas・zones・regions_enriched）の `<field>` と `<field>_kana` の組を
+text -> reading として SQLite に書き出す。BigQuery から直接読むか、ローカルのエクスポート
+（JSON 配列 / NDJSON）から作成できる。
+
+Usage:
+    python scripts/build_kana_readings.py --project [PROJECT_ID]
+    python scripts/build_kana_readings.py --input creatures_enriched.json --input points_enriched.ndjson
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+DEFAULT_DATASET = "wedive_master_data_v1"
+ENRICHED_TABLES = ["creatures_enriched", "points_enriched", "areas_enriched", "zones_enriched", "regions_enriched"]
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "..", "functions", "kana-converter", "readings.db")
+
+
+def rows_from_bigquery(project_id, dataset_id):
+    from google.cloud import bigquery
+
+    client = bigquery.Client(project=project_id)
+    for table in ENRICHED_TABLES:
+        print(f"Reading {dataset_id}.{table}...")
+        for row in client.query(f"SELECT * FROM `{project_id}.{dataset_id}.{table}`").result():
+            yield dict(row.items())
+
+
+def rows_from_file(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".ndjson") or path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def extract_readings(rows):
+    """行から (text, reading) の組を取り出す（同じ text は後勝ち）"""
+    readings = {}
+    for row in rows:
+        for k, reading in row.items():
+            if not k.endswith("_kana") or not reading:
+                continue
+            text = row.get(k[:-len("_kana")])
+            if isinstance(text, str) and text.strip():
+                readings[text] = reading
+    return readings
+
+
+def write_db(readings, output, source):
+    tmp_path = f"{output}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE readings (text TEXT PRIMARY KEY, reading TEXT NOT NULL) WITHOUT ROWID")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO readings VALUES (?, ?)", sorted(readings.items()))
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("built_at", datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")),
+        ("source", source),
+        ("entries", str(len(readings))),
+    ])
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+    # 作成途中のファイルを同梱しないよう、完成後に置き換える
+    os.replace(tmp_path, output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the kana-converter reading cache from enriched tables")
+    parser.add_argument("--project", default=os.environ.get("GCP_PROJECT"), help="Google Cloud Project ID")
+    parser.add_argument("--dataset", default=os.environ.get("BQ_DATASET", DEFAULT_DATASET), help="BigQuery dataset")
+    parser.add_argument("--input", action="append", help="Local export of *_enriched (JSON array or NDJSON). Repeatable")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Output SQLite path")
+
+    args = parser.parse_args()
+    if args.input:
+        rows = (row for path in args.input for row in rows_from_file(path))
+        source = ",".join(os.path.basename(p) for p in args.input)
+    elif args.project:
+        rows = rows_from_bigquery(args.project, args.dataset)
+        source = f"{args.project}.{args.dataset}"
+    else:
+        parser.error("--project or --input is required")
+
+    readings = extract_readings(rows)
+    write_db(readings, os.path.abspath(args.output), source)
+    print(f"Wrote {len(readings)} readings to {os.path.abspath(args.output)}")
@@ -0,0 +1,56 @@
+"""
+bigquery/enrich_points.sql / enrich_creatures.sql を実行した場合の fn_to_kana（Remote Function）の呼び出し回数を見積もる。
+
+現在のデータに対して、変換が必要な行数と name の種類数を集計し、
+変更前（行 × SQL 内の呼び出し箇所）と変更後（name の種類ごとに 1 回）の呼び出し回数を表示する。
+集計クエリのみ実行し、Remote Function は呼び出さない。
+WAREHOUSE=sqlite と WAREHOUSE_SQLITE_PATH を指定するとローカルウェアハウス（benchmarks/bench_pipeline.py --keep）で実行できる。
+
+Usage:
+    python scripts/measure_enrich_sql_calls.py --project [PROJECT_ID] [--dataset wedive_master_data_v1]
+    WAREHOUSE=sqlite WAREHOUSE_SQLITE_PATH=/tmp/wedive/warehouse.db python scripts/measure_enrich_sql_calls.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", "shared"))
+from warehouse import get_warehouse  # noqa: E402
+
+
+def points_counts(warehouse):
+    """変更前: 変換が必要な行 × 2（name_kana と search_text）"""
+    rows, _ = warehouse.query_rows(f"""
+        SELECT COUNT(*) AS changed_rows, COUNT(DISTINCT JSON_VALUE(s.data, '$.name')) AS distinct_names
+        FROM {warehouse.table("points_raw_latest")} s
+        LEFT JOIN {warehouse.table("points_enriched")} t ON s.document_id = t.id
+        WHERE t.id IS NULL OR t.name != JSON_VALUE(s.data, '$.name') OR t.search_text IS NULL
+    """)
+    return rows[0]["changed_rows"] * 2, rows[0]["distinct_names"]
+
+
+def creatures_counts(warehouse):
+    """変更前: 全行 × 3（name_kana と search_text 内の 2 箇所）"""
+    rows, _ = warehouse.query_rows(f"""
+        SELECT
+          COUNT(*) AS total_rows,
+          COUNT(DISTINCT CASE
+            WHEN t.id IS NULL OR t.name != JSON_VALUE(s.data, '$.name') OR t.name_kana IS NULL
+            THEN JSON_VALUE(s.data, '$.name') END) AS distinct_names
+        FROM {warehouse.table("creatures_raw_latest")} s
+        LEFT JOIN {warehouse.table("creatures_enriched")} t ON s.document_id = t.id
+    """)
+    return rows[0]["total_rows"] * 3, rows[0]["distinct_names"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate fn_to_kana calls made by the enrichment SQL")
+    parser.add_argument("--project", default=os.environ.get("GCP_PROJECT"))
+    parser.add_argument("--dataset", default=os.environ.get("BQ_DATASET", "wedive_master_data_v1"))
+    args = parser.parse_args()
+
+    warehouse = get_warehouse(args.project, args.dataset)
+    for name, counts in [("enrich_points.sql", points_counts), ("enrich_creatures.sql", creatures_counts)]:
+        before, after = counts(warehouse)
+        saved = 1 - after / before if before else 0.0
+        print(f"{name}: before={before:,} calls after={after:,} calls (saved {saved:.1%})")